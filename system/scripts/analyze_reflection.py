@@ -5,6 +5,7 @@
 
 import os
 import sys
+from bisect import bisect_right
 from datetime import datetime
 from pathlib import Path
 import sys
@@ -13,77 +14,232 @@ import sys
 SCRIPT_DIR = Path(__file__).parent
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from config_loader import get_project_root, get_path
+from config_loader import get_project_root, get_path, read_text_file, write_text_file
+from goal_cache import read_goal_status
 import re
 
+# RE2 (google-re2) сопоставляет за линейное время без бэктрекинга.
+# Если пакет не установлен, те же шаблоны выполняет стандартный re.
+try:
+    import re2 as keyword_re
+except ImportError:
+    keyword_re = re
+
 # Пути к директориям
 PROJECT_ROOT = get_project_root()
 GOALS_DIR = get_path("goals")
 REFLECTIONS_DIR = get_path("reflections")
 DAILY_DIR = REFLECTIONS_DIR / "daily"
 
+# Секции-списки рефлексии: заголовок -> (ключ в reflection_data, список из чекбоксов)
+_LIST_SECTIONS = {
+    '#### Операции:': ('operations_done', True),
+    '#### Тактика:': ('tactics_done', True),
+    '### Доказательства идентичности': ('evidence_done', True),
+    '**Что помешало:**': ('obstacles', False),
+    '**Что помогло:**': ('helpful_factors', False),
+}
+_CHECKBOX_PREFIXES = ('- [ ] ', '- [x] ')
+
+# Однострочные поля: префикс строки -> ключ в reflection_data
+_NUMBER_FIELDS = {
+    '**Общая оценка:**': 'rating',
+    '**Выполнение операций:**': 'operations_percent',
+    '**Выполнение тактики:**': 'tactics_percent',
+}
+_TEXT_FIELDS = {
+    '**Энергия:**': 'energy',
+    '**Мотивация:**': 'motivation',
+    '**Фокус:**': 'focus',
+}
+
+COMMENTS_HEADER = "## Комментарии ИИ-системы"
+
+# Уровни оценки процента выполнения в виде двух параллельных таблиц:
+# возрастающие пороги и сообщения (на одно больше, чем порогов).
+# Индекс уровня = bisect_right(пороги, процент), как np.searchsorted.
+_OPS_TIER_THRESHOLDS = (60, 80)
+_OPS_TIER_MESSAGES = (
+    "❌ Низкое выполнение операций ({}%). Нужно разобраться в причинах.",
+    "⚠️  Хорошее выполнение операций ({}%), но есть потенциал для улучшения.",
+    "✅ Отличное выполнение операций ({}%)! Вы на правильном пути.",
+)
+_TACTICS_TIER_THRESHOLDS = (50, 80)
+_TACTICS_TIER_MESSAGES = (
+    "❌ Низкий прогресс по тактике ({}%). Возможно, задачи слишком сложные.",
+    "⚠️  Умеренный прогресс по тактике ({}%).",
+    "✅ Отличный прогресс по тактическим задачам ({})!",
+)
+
+# Рекомендации при низком самочувствии: (поле, маркер низкого значения, рекомендация)
+_LOW_STATE_RECOMMENDATIONS = (
+    ('energy', 'низкая', "💪 Низкая энергия может влиять на выполнение. Рассмотрите изменение времени выполнения задач или добавление восстановительных практик."),
+    ('motivation', 'низкая', "🎯 Низкая мотивация? Напомните себе о стратегической идентичности и долгосрочных целях."),
+    ('focus', 'низкий', "🎯 Низкий фокус? Попробуйте технику Pomodoro или уменьшите количество одновременных задач."),
+)
+
+# Адаптации при выполнении ниже 50%: (поле, адаптация)
+_LOW_PERCENT_ADAPTATIONS = (
+    ('operations_percent', "💡 Рекомендуется упростить операционные действия или изменить триггеры для лучшего выполнения."),
+    ('tactics_percent', "💡 Тактические задачи могут быть слишком сложными. Рассмотрите разбиение на меньшие шаги."),
+)
+
+INSIGHTS_HEADER = "## Инсайты и наблюдения"
+PLAN_HEADER = "## План на завтра"
+
+# Текст свободной секции заканчивается на разделителе или следующем заголовке
+_SECTION_TERMINATORS = ("\n---", "\n##")
+
+# Ключевые слова для вынужденных изменений
+FORCED_KEYWORDS = (
+    r'авария', r'потерял', r'уволили', r'болезнь', r'кризис',
+    r'не могу', r'невозможно', r'форс-мажор', r'вынужден',
+    r'пришлось', r'обстоятельства', r'потеря дохода', r'потеря работы',
+    r'травм', r'госпитал', r'операция'
+)
+
+# Ключевые слова для добровольных изменений
+VOLUNTARY_KEYWORDS = (
+    r'решил изменить', r'переосмыслил', r'понял, что',
+    r'новые приоритеты', r'больше не актуально',
+    r'хочу сфокусироваться', r'изменил приоритеты'
+)
+
+# Вынужденные изменения с высокой уверенностью
+HIGH_CONFIDENCE_KEYWORDS = frozenset(('авария', 'потерял', 'уволили', 'болезнь'))
+
+# Все ключевые слова ищутся одним шаблоном-альтернативой за один проход.
+# Ключевые слова в нижнем регистре, поэтому поиск идёт по content.lower()
+# без флага IGNORECASE.
+_CRITICAL_RE = keyword_re.compile('|'.join(FORCED_KEYWORDS + VOLUNTARY_KEYWORDS))
+_CRITICAL_RE_ANY_CASE = keyword_re.compile(r'(?i)' + _CRITICAL_RE.pattern)
+
+# Сколько символов контекста брать вокруг ключевого слова
+CONTEXT_RADIUS = 100
+CONTEXT_MAX_LENGTH = 200
+
+def _find_keywords(content):
+    """Возвращает {ключевое слово: первое совпадение} для слов, встречающихся в тексте."""
+    text_to_check = content.lower()
+    pattern = _CRITICAL_RE
+    if len(text_to_check) != len(content):
+        # Редкие символы (например, 'İ') меняют длину при lower(), и позиции
+        # совпадений разошлись бы с исходным текстом
+        text_to_check = content
+        pattern = _CRITICAL_RE_ANY_CASE
+    
+    found = {}
+    pos = 0
+    while True:
+        match = pattern.search(text_to_check, pos)
+        if match is None:
+            break
+        found.setdefault(match.group().lower(), match)
+        # Продолжаем со следующего символа, а не с конца совпадения:
+        # ключевые слова могут перекрываться
+        pos = match.start() + 1
+    return found
+
+def _keyword_context(content, match):
+    """Возвращает фрагмент текста вокруг совпадения ключевого слова."""
+    start = max(0, match.start() - CONTEXT_RADIUS)
+    return content[start:match.end() + CONTEXT_RADIUS][:CONTEXT_MAX_LENGTH]
+
 def detect_critical_events(content):
     """Выявляет критические события в рефлексии."""
     critical_events = []
     
-    # Ключевые слова для вынужденных изменений
-    forced_keywords = [
-        r'авария', r'потерял', r'уволили', r'болезнь', r'кризис',
-        r'не могу', r'невозможно', r'форс-мажор', r'вынужден',
-        r'пришлось', r'обстоятельства', r'потеря дохода', r'потеря работы',
-        r'травм', r'госпитал', r'операция'
-    ]
-    
-    # Ключевые слова для добровольных изменений
-    voluntary_keywords = [
-        r'решил изменить', r'переосмыслил', r'понял, что',
-        r'новые приоритеты', r'больше не актуально',
-        r'хочу сфокусироваться', r'изменил приоритеты'
-    ]
-    
-    # Проверяем препятствия и инсайты
-    obstacles_section = re.search(r'\*\*Что помешало:\*\*\s*\n((?:- .+\n?)+)', content, re.MULTILINE)
-    insights_section = re.search(r'## Инсайты и наблюдения\s*\n\n(.+?)(?=\n---|\n##|$)', content, re.DOTALL)
-    reflection_section = re.search(r'## 💭 РЕФЛЕКСИЯ\s*\n(.+?)(?=\n---|\n##|$)', content, re.DOTALL)
-    
-    text_to_check = content.lower()
+    found = _find_keywords(content)
     
     # Проверяем на вынужденные изменения
-    for keyword in forced_keywords:
-        if re.search(keyword, text_to_check, re.IGNORECASE):
-            # Находим контекст
-            pattern = r'.{0,100}' + keyword + r'.{0,100}'
-            matches = re.findall(pattern, content, re.IGNORECASE | re.DOTALL)
-            if matches:
-                critical_events.append({
-                    'type': 'FORCED_CHANGE',
-                    'keyword': keyword,
-                    'context': matches[0][:200],
-                    'confidence': 'high' if keyword in ['авария', 'потерял', 'уволили', 'болезнь'] else 'medium'
-                })
+    for keyword in FORCED_KEYWORDS:
+        if keyword in found:
+            critical_events.append({
+                'type': 'FORCED_CHANGE',
+                'keyword': keyword,
+                'context': _keyword_context(content, found[keyword]),
+                'confidence': 'high' if keyword in HIGH_CONFIDENCE_KEYWORDS else 'medium'
+            })
     
     # Проверяем на добровольные изменения
-    for keyword in voluntary_keywords:
-        if re.search(keyword, text_to_check, re.IGNORECASE):
-            pattern = r'.{0,100}' + keyword + r'.{0,100}'
-            matches = re.findall(pattern, content, re.IGNORECASE | re.DOTALL)
-            if matches:
-                critical_events.append({
-                    'type': 'VOLUNTARY_CHANGE',
-                    'keyword': keyword,
-                    'context': matches[0][:200],
-                    'confidence': 'medium'
-                })
+    for keyword in VOLUNTARY_KEYWORDS:
+        if keyword in found:
+            critical_events.append({
+                'type': 'VOLUNTARY_CHANGE',
+                'keyword': keyword,
+                'context': _keyword_context(content, found[keyword]),
+                'confidence': 'medium'
+            })
     
     return critical_events
 
+def _is_list_item(line, checkbox):
+    """Проверяет, продолжает ли строка список текущей секции."""
+    if checkbox:
+        return line.startswith(_CHECKBOX_PREFIXES) and len(line) > 6
+    return line.startswith('- ') and len(line) > 2
+
+def _store_list_section(reflection_data, key, checkbox, items):
+    """Сохраняет элементы секции-списка в reflection_data."""
+    if checkbox:
+        for line in items:
+            if '[x]' in line or '[X]' in line:
+                # Отрезаем префикс "- [x]" по первой закрывающей скобке
+                value = line[line.find(']') + 1:].strip()
+                if value:
+                    reflection_data[key].append(value)
+    else:
+        reflection_data[key] = [
+            line.strip('- ').strip()
+            for line in items
+            if line.strip() and not line.strip() == '-'
+        ]
+
+def _parse_number_field(value):
+    """Извлекает число из значения вида '[7]', '[65%]' или '7'."""
+    value = value.lstrip()
+    if value.startswith('['):
+        value = value[1:]
+    digits = len(value) - len(value.lstrip('0123456789'))
+    return int(value[:digits]) if digits else None
+
+def _parse_text_field(value):
+    """Извлекает текст из значения вида '[низкая]' или 'низкая'."""
+    value = value.strip()
+    if value.startswith('['):
+        value = value[1:]
+    return value.split(']', 1)[0].strip() or None
+
+def _extract_section(content, header, terminators=_SECTION_TERMINATORS):
+    """Возвращает текст свободной секции после заголовка header ('' если секции нет)."""
+    start = content.find(header)
+    if start < 0:
+        return ''
+    start += len(header)
+    
+    end = len(content)
+    for terminator in terminators:
+        pos = content.find(terminator, start, end)
+        if pos != -1:
+            end = pos
+    return content[start:end].strip()
+
 def parse_reflection_file(reflection_path):
     """Парсит файл рефлексии и извлекает данные."""
-    with open(reflection_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
+    return parse_reflection_content(read_text_file(reflection_path), reflection_path.stem)
+
+def try_parse_reflection_file(reflection_path):
+    """Парсит файл рефлексии; None, если файл не читается или поврежден."""
+    try:
+        return parse_reflection_file(reflection_path)
+    except (OSError, ValueError):
+        # ValueError включает UnicodeDecodeError и ошибки разбора чисел
+        return None
+
+def parse_reflection_content(content, date):
+    """Извлекает данные из уже прочитанного содержимого рефлексии за дату date."""
     reflection_data = {
-        'date': reflection_path.stem,
+        'date': date,
         'operations_done': [],
         'tactics_done': [],
         'evidence_done': [],
@@ -100,92 +256,56 @@ def parse_reflection_file(reflection_path):
         'critical_events': detect_critical_events(content)
     }
     
-    # Извлечение выполненных операций
-    operations_section = re.search(r'#### Операции:\s*\n((?:- \[[ x]\] .+\n?)+)', content, re.MULTILINE)
-    if operations_section:
-        for line in operations_section.group(1).strip().split('\n'):
-            if line.strip() and not line.strip().startswith('- [ ]') and not line.strip().startswith('- [x]'):
+    # Один проход по строкам: секции-списки и однострочные поля.
+    # Для каждого поля учитывается первое вхождение, как раньше с re.search.
+    found = set()
+    section = None
+    items = []
+    for line in content.split('\n'):
+        if section is not None:
+            key, checkbox = section
+            if _is_list_item(line, checkbox):
+                items.append(line)
                 continue
-            if '[x]' in line or '[X]' in line:
-                action = re.sub(r'- \[[xX]\]\s*', '', line).strip()
-                if action:
-                    reflection_data['operations_done'].append(action)
-    
-    # Извлечение выполненных тактических задач
-    tactics_section = re.search(r'#### Тактика:\s*\n((?:- \[[ x]\] .+\n?)+)', content, re.MULTILINE)
-    if tactics_section:
-        for line in tactics_section.group(1).strip().split('\n'):
-            if '[x]' in line or '[X]' in line:
-                task = re.sub(r'- \[[xX]\]\s*', '', line).strip()
-                if task:
-                    reflection_data['tactics_done'].append(task)
-    
-    # Извлечение доказательств идентичности
-    evidence_section = re.search(r'### Доказательства идентичности\s*\n((?:- \[[ x]\] .+\n?)+)', content, re.MULTILINE)
-    if evidence_section:
-        for line in evidence_section.group(1).strip().split('\n'):
-            if '[x]' in line or '[X]' in line:
-                evidence = re.sub(r'- \[[xX]\]\s*', '', line).strip()
-                if evidence:
-                    reflection_data['evidence_done'].append(evidence)
-    
-    # Извлечение препятствий
-    obstacles_section = re.search(r'\*\*Что помешало:\*\*\s*\n((?:- .+\n?)+)', content, re.MULTILINE)
-    if obstacles_section:
-        reflection_data['obstacles'] = [
-            line.strip('- ').strip() 
-            for line in obstacles_section.group(1).strip().split('\n')
-            if line.strip() and not line.strip() == '-'
-        ]
-    
-    # Извлечение полезных факторов
-    helpful_section = re.search(r'\*\*Что помогло:\*\*\s*\n((?:- .+\n?)+)', content, re.MULTILINE)
-    if helpful_section:
-        reflection_data['helpful_factors'] = [
-            line.strip('- ').strip() 
-            for line in helpful_section.group(1).strip().split('\n')
-            if line.strip() and not line.strip() == '-'
-        ]
-    
-    # Извлечение оценки
-    rating_match = re.search(r'\*\*Общая оценка:\*\*\s*\[?(\d+)\]?', content, re.MULTILINE)
-    if rating_match:
-        reflection_data['rating'] = int(rating_match.group(1))
-    
-    # Извлечение процентов
-    ops_percent_match = re.search(r'\*\*Выполнение операций:\*\*\s*\[?(\d+)%?\]?', content, re.MULTILINE)
-    if ops_percent_match:
-        reflection_data['operations_percent'] = int(ops_percent_match.group(1))
-    
-    tactics_percent_match = re.search(r'\*\*Выполнение тактики:\*\*\s*\[?(\d+)%?\]?', content, re.MULTILINE)
-    if tactics_percent_match:
-        reflection_data['tactics_percent'] = int(tactics_percent_match.group(1))
-    
-    # Извлечение энергии, мотивации, фокуса
-    energy_match = re.search(r'\*\*Энергия:\*\*\s*\[?([^\]]+)\]?', content, re.MULTILINE)
-    if energy_match:
-        reflection_data['energy'] = energy_match.group(1).strip()
-    
-    motivation_match = re.search(r'\*\*Мотивация:\*\*\s*\[?([^\]]+)\]?', content, re.MULTILINE)
-    if motivation_match:
-        reflection_data['motivation'] = motivation_match.group(1).strip()
-    
-    focus_match = re.search(r'\*\*Фокус:\*\*\s*\[?([^\]]+)\]?', content, re.MULTILINE)
-    if focus_match:
-        reflection_data['focus'] = focus_match.group(1).strip()
+            if not items and not line.strip():
+                continue
+            if items:
+                _store_list_section(reflection_data, key, checkbox, items)
+                found.add(key)
+            section = None
+            items = []
+        
+        stripped = line.strip()
+        if stripped in _LIST_SECTIONS:
+            if _LIST_SECTIONS[stripped][0] not in found:
+                section = _LIST_SECTIONS[stripped]
+            continue
+        
+        if not stripped.startswith('**'):
+            continue
+        for prefix, key in _NUMBER_FIELDS.items():
+            if reflection_data[key] is None and stripped.startswith(prefix):
+                reflection_data[key] = _parse_number_field(stripped[len(prefix):])
+                break
+        else:
+            for prefix, key in _TEXT_FIELDS.items():
+                if reflection_data[key] is None and stripped.startswith(prefix):
+                    reflection_data[key] = _parse_text_field(stripped[len(prefix):])
+                    break
     
-    # Извлечение инсайтов
-    insights_section = re.search(r'## Инсайты и наблюдения\s*\n\n(.+?)(?=\n---|\n##|$)', content, re.DOTALL)
-    if insights_section:
-        reflection_data['insights'] = insights_section.group(1).strip()
+    if section is not None and items:
+        _store_list_section(reflection_data, section[0], section[1], items)
     
-    # Извлечение плана на завтра
-    plan_section = re.search(r'## План на завтра\s*\n\n(.+?)(?=\n---|\n##|$)', content, re.DOTALL)
-    if plan_section:
-        reflection_data['plan_tomorrow'] = plan_section.group(1).strip()
+    # Извлечение инсайтов и плана на завтра
+    reflection_data['insights'] = _extract_section(content, INSIGHTS_HEADER)
+    reflection_data['plan_tomorrow'] = _extract_section(content, PLAN_HEADER)
     
     return reflection_data
 
+def _tier_message(thresholds, messages, percent):
+    """Возвращает сообщение уровня, в который попадает percent."""
+    return messages[bisect_right(thresholds, percent)].format(percent)
+
 def generate_ai_comments(reflection_data, active_goals):
     """Генерирует комментарии ИИ-системы на основе анализа рефлексии."""
     comments = {
@@ -225,13 +345,7 @@ def generate_ai_comments(reflection_data, active_goals):
     # Анализ выполнения операций
     total_operations = len(reflection_data['operations_done'])
     if reflection_data['operations_percent'] is not None:
-        ops_percent = reflection_data['operations_percent']
-        if ops_percent >= 80:
-            comments['analysis'].append(f"✅ Отличное выполнение операций ({ops_percent}%)! Вы на правильном пути.")
-        elif ops_percent >= 60:
-            comments['analysis'].append(f"⚠️  Хорошее выполнение операций ({ops_percent}%), но есть потенциал для улучшения.")
-        else:
-            comments['analysis'].append(f"❌ Низкое выполнение операций ({ops_percent}%). Нужно разобраться в причинах.")
+        comments['analysis'].append(_tier_message(_OPS_TIER_THRESHOLDS, _OPS_TIER_MESSAGES, reflection_data['operations_percent']))
     else:
         if total_operations > 0:
             comments['analysis'].append(f"Выполнено {total_operations} операционных действий.")
@@ -240,13 +354,7 @@ def generate_ai_comments(reflection_data, active_goals):
     
     # Анализ выполнения тактики
     if reflection_data['tactics_percent'] is not None:
-        tactics_percent = reflection_data['tactics_percent']
-        if tactics_percent >= 80:
-            comments['analysis'].append(f"✅ Отличный прогресс по тактическим задачам ({tactics_percent})!")
-        elif tactics_percent >= 50:
-            comments['analysis'].append(f"⚠️  Умеренный прогресс по тактике ({tactics_percent}%).")
-        else:
-            comments['analysis'].append(f"❌ Низкий прогресс по тактике ({tactics_percent}%). Возможно, задачи слишком сложные.")
+        comments['analysis'].append(_tier_message(_TACTICS_TIER_THRESHOLDS, _TACTICS_TIER_MESSAGES, reflection_data['tactics_percent']))
     
     # Анализ доказательств идентичности
     evidence_count = len(reflection_data['evidence_done'])
@@ -267,14 +375,10 @@ def generate_ai_comments(reflection_data, active_goals):
         comments['analysis'].append(f"✨ Выделено {len(reflection_data['helpful_factors'])} полезных факторов. Продолжайте их использовать!")
     
     # Анализ энергии, мотивации, фокуса
-    if reflection_data['energy'] and 'низкая' in reflection_data['energy'].lower():
-        comments['recommendations'].append("💪 Низкая энергия может влиять на выполнение. Рассмотрите изменение времени выполнения задач или добавление восстановительных практик.")
-    
-    if reflection_data['motivation'] and 'низкая' in reflection_data['motivation'].lower():
-        comments['recommendations'].append("🎯 Низкая мотивация? Напомните себе о стратегической идентичности и долгосрочных целях.")
-    
-    if reflection_data['focus'] and 'низкий' in reflection_data['focus'].lower():
-        comments['recommendations'].append("🎯 Низкий фокус? Попробуйте технику Pomodoro или уменьшите количество одновременных задач.")
+    for key, low_marker, recommendation in _LOW_STATE_RECOMMENDATIONS:
+        value = reflection_data[key]
+        if value and low_marker in value.lower():
+            comments['recommendations'].append(recommendation)
     
     # Рекомендации на основе оценки
     if reflection_data['rating'] is not None:
@@ -284,11 +388,9 @@ def generate_ai_comments(reflection_data, active_goals):
             comments['recommendations'].append("🎉 Высокая оценка дня! Продолжайте в том же духе. Можете даже немного увеличить сложность задач.")
     
     # Адаптации (если нужно)
-    if reflection_data['operations_percent'] is not None and reflection_data['operations_percent'] < 50:
-        comments['adaptations'].append("💡 Рекомендуется упростить операционные действия или изменить триггеры для лучшего выполнения.")
-    
-    if reflection_data['tactics_percent'] is not None and reflection_data['tactics_percent'] < 50:
-        comments['adaptations'].append("💡 Тактические задачи могут быть слишком сложными. Рассмотрите разбиение на меньшие шаги.")
+    for key, adaptation in _LOW_PERCENT_ADAPTATIONS:
+        if reflection_data[key] is not None and reflection_data[key] < 50:
+            comments['adaptations'].append(adaptation)
     
     # Если нет рекомендаций, добавим общие
     if not comments['recommendations']:
@@ -299,47 +401,56 @@ def generate_ai_comments(reflection_data, active_goals):
     
     return comments
 
-def update_reflection_with_comments(reflection_path, comments):
-    """Обновляет файл рефлексии, добавляя комментарии ИИ-системы."""
-    with open(reflection_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def generate_ai_comments_batch(reflections, active_goals):
+    """Генерирует комментарии для списка рефлексий (например, за неделю или месяц)."""
+    return [generate_ai_comments(reflection_data, active_goals) for reflection_data in reflections]
+
+def update_reflection_with_comments(reflection_path, comments, content=None):
+    """Обновляет файл рефлексии, добавляя комментарии ИИ-системы.
     
-    # Формируем секцию комментариев
-    comments_section = "\n## Комментарии ИИ-системы\n\n"
-    comments_section += "*[Автоматически сгенерировано после анализа]*\n\n"
+    content - уже прочитанное содержимое файла, чтобы не читать его повторно.
+    """
+    if content is None:
+        content = read_text_file(reflection_path)
     
-    comments_section += "### Анализ прогресса:\n"
-    for analysis in comments['analysis']:
-        comments_section += f"- {analysis}\n"
+    # Формируем секцию комментариев
+    parts = [
+        "\n## Комментарии ИИ-системы\n\n",
+        "*[Автоматически сгенерировано после анализа]*\n\n",
+        "### Анализ прогресса:\n"
+    ]
+    parts.extend(f"- {analysis}\n" for analysis in comments['analysis'])
     
-    comments_section += "\n### Рекомендации:\n"
-    for rec in comments['recommendations']:
-        comments_section += f"- {rec}\n"
+    parts.append("\n### Рекомендации:\n")
+    parts.extend(f"- {rec}\n" for rec in comments['recommendations'])
     
-    comments_section += "\n### Адаптации:\n"
-    for adapt in comments['adaptations']:
-        comments_section += f"- {adapt}\n"
+    parts.append("\n### Адаптации:\n")
+    parts.extend(f"- {adapt}\n" for adapt in comments['adaptations'])
     
     # Добавляем информацию о критических событиях
     if comments['critical_events']:
-        comments_section += "\n### ⚠️ Критические события:\n"
+        parts.append("\n### ⚠️ Критические события:\n")
         for event in comments['critical_events']:
-            comments_section += f"- **{event['type']}:** {event['message']}\n"
-            comments_section += f"  - Контекст: {event['context'][:150]}...\n"
-            comments_section += f"  - Действие: {event['action']}\n"
+            parts.append(f"- **{event['type']}:** {event['message']}\n")
+            parts.append(f"  - Контекст: {event['context'][:150]}...\n")
+            parts.append(f"  - Действие: {event['action']}\n")
+    
+    comments_section = "".join(parts)
     
     # Заменяем или добавляем секцию комментариев
-    if "## Комментарии ИИ-системы" in content:
-        # Заменяем существующую секцию
-        pattern = r'## Комментарии ИИ-системы.*?(?=\n## |$)'
-        content = re.sub(pattern, comments_section.strip(), content, flags=re.DOTALL)
+    start = content.find(COMMENTS_HEADER)
+    if start != -1:
+        # Заменяем существующую секцию до следующего заголовка "## " или конца файла
+        end = content.find("\n## ", start + len(COMMENTS_HEADER))
+        if end == -1:
+            end = len(content) - 1 if content.endswith("\n") else len(content)
+        content = content[:start] + comments_section.strip() + content[end:]
     else:
         # Добавляем в конец
         content = content.rstrip() + "\n\n" + comments_section
     
-    # Сохраняем
-    with open(reflection_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    # Сохраняем атомарно: через временный файл и os.replace
+    write_text_file(reflection_path, content)
     
     print(f"✅ Комментарии ИИ-системы добавлены в {reflection_path}")
 
@@ -347,13 +458,60 @@ def get_active_goals():
     """Получает все активные цели."""
     active_goals = []
     if GOALS_DIR.exists():
-        for goal_file in GOALS_DIR.glob("*.md"):
-            with open(goal_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                if '**Статус:** active' in content:
-                    active_goals.append(goal_file.stem)
+        with os.scandir(GOALS_DIR) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.name.endswith('.md'):
+                    continue
+                if entry.is_file() and read_goal_status(entry.path) == 'active':
+                    active_goals.append(entry.name[:-3])
     return active_goals
 
+def find_reflections_in_range(since=None, until=None):
+    """Находит ежедневные рефлексии с датой в диапазоне [since, until] (YYYY-MM-DD)."""
+    reflections = []
+    if not DAILY_DIR.exists():
+        return reflections
+    
+    for reflection_path in DAILY_DIR.rglob("*.md"):
+        date_str = reflection_path.stem
+        try:
+            datetime.strptime(date_str, "%Y-%m-%d")
+        except ValueError:
+            continue
+        # Даты в формате ISO сравниваются как строки
+        if since and date_str < since:
+            continue
+        if until and date_str > until:
+            continue
+        reflections.append(reflection_path)
+    
+    return sorted(reflections, key=lambda path: path.stem)
+
+def list_reflection_files(dates):
+    """Получить имена файлов рефлексий в месячных директориях, затронутых датами."""
+    existing = set()
+    for year, month in {(d.year, d.month) for d in dates}:
+        month_dir = DAILY_DIR / f"{year:04d}" / f"{month:02d}"
+        try:
+            with os.scandir(month_dir) as entries:
+                existing.update(entry.name for entry in entries if entry.is_file())
+        except OSError:
+            # Нет директории за месяц — нет и рефлексий
+            pass
+    return existing
+
+def analyze_reflections_batch(reflection_paths, active_goals):
+    """Анализирует несколько рефлексий за один запуск с общим списком активных целей."""
+    contents = [read_text_file(reflection_path) for reflection_path in reflection_paths]
+    reflections = [
+        parse_reflection_content(content, reflection_path.stem)
+        for reflection_path, content in zip(reflection_paths, contents)
+    ]
+    all_comments = generate_ai_comments_batch(reflections, active_goals)
+    for reflection_path, comments, content in zip(reflection_paths, all_comments, contents):
+        update_reflection_with_comments(reflection_path, comments, content)
+    return len(reflection_paths)
+
 def main():
     """Главная функция."""
     import argparse
@@ -361,10 +519,26 @@ def main():
     parser = argparse.ArgumentParser(description='Анализ заполненной рефлексии')
     parser.add_argument('--date', type=str, help='Дата в формате YYYY-MM-DD (по умолчанию сегодня)')
     parser.add_argument('--file', type=str, help='Путь к файлу рефлексии')
+    parser.add_argument('--since', type=str, help='Пакетный режим: начальная дата YYYY-MM-DD')
+    parser.add_argument('--until', type=str, help='Пакетный режим: конечная дата YYYY-MM-DD (включительно)')
     
     args = parser.parse_args()
     
     try:
+        if args.since or args.until:
+            # Пакетный режим: цели читаются один раз для всех рефлексий
+            since = datetime.strptime(args.since, "%Y-%m-%d").strftime("%Y-%m-%d") if args.since else None
+            until = datetime.strptime(args.until, "%Y-%m-%d").strftime("%Y-%m-%d") if args.until else None
+            reflection_paths = find_reflections_in_range(since, until)
+            
+            if not reflection_paths:
+                print("⚠️  Рефлексии за указанный период не найдены")
+                return
+            
+            count = analyze_reflections_batch(reflection_paths, get_active_goals())
+            print(f"✅ Анализ завершён! Обработано рефлексий: {count}")
+            return
+        
         if args.file:
             reflection_path = Path(args.file)
         elif args.date:
@@ -382,8 +556,9 @@ def main():
             print(f"❌ Файл рефлексии не найден: {reflection_path}", file=sys.stderr)
             sys.exit(1)
         
-        # Парсим рефлексию
-        reflection_data = parse_reflection_file(reflection_path)
+        # Парсим рефлексию (содержимое читается один раз и переиспользуется при записи)
+        content = read_text_file(reflection_path)
+        reflection_data = parse_reflection_content(content, reflection_path.stem)
         
         # Получаем активные цели
         active_goals = get_active_goals()
@@ -392,7 +567,7 @@ def main():
         comments = generate_ai_comments(reflection_data, active_goals)
         
         # Обновляем файл
-        update_reflection_with_comments(reflection_path, comments)
+        update_reflection_with_comments(reflection_path, comments, content)
         
         print("✅ Анализ завершён!")
         
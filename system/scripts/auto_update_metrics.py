@@ -12,6 +12,7 @@
 - python scripts/auto_update_metrics.py               # за сегодня
 - python scripts/auto_update_metrics.py --date 2025-12-21  # за дату
 - python scripts/auto_update_metrics.py --period week      # за неделю
+- python scripts/auto_update_metrics.py --log-file         # с записью лога в logs/
 """
 
 import re
@@ -23,9 +24,9 @@ import sys
 SCRIPT_DIR = Path(__file__).parent
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from config_loader import get_project_root, get_path
+from config_loader import get_project_root, get_path, read_text_file, write_text_file
+from goal_cache import read_goal_status
 from datetime import datetime, timedelta
-import argparse
 import logging
 
 # Импорт функций из существующих скриптов
@@ -39,25 +40,34 @@ REFLECTIONS_DIR = get_path("reflections")
 DAILY_DIR = REFLECTIONS_DIR / "daily"
 LOGS_DIR = get_path("logs")
 
+_EVIDENCE_RE = re.compile(r'\*\*Текущий прогресс:\*\* (\d+)/10')
+
+# Поля файла цели, которые update_goal_metrics заменяет за один проход
+_GOAL_METRICS_RE = re.compile(
+    r'(?P<evidence>\*\*Текущий прогресс:\*\* \d+/10)'
+    r'|(?P<habits>\*\*Выполнение:\*\* \d+%)'
+    r'|(?P<last_update>\*\*Последнее обновление:\*\* \d{4}-\d{2}-\d{2})'
+    r'|(?P<history>## ИСТОРИЯ ИЗМЕНЕНИЙ\s*\n)'
+)
+
 
 def get_active_goals():
     """Получить все активные цели."""
     active_goals = []
     if GOALS_DIR.exists():
         for goal_file in GOALS_DIR.glob("*.md"):
-            with open(goal_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                if '**Статус:** active' in content:
-                    active_goals.append(goal_file)
+            # Статус читается из начала файла, без декодирования всего файла
+            if read_goal_status(goal_file) == 'active':
+                active_goals.append(goal_file)
     return active_goals
 
 
 def get_reflection_path(date):
     """Получить путь к рефлексии за дату."""
-    year = date.strftime("%Y")
-    month = date.strftime("%m")
-    filename = date.strftime("%Y-%m-%d")
-    return DAILY_DIR / year / month / f"{filename}.md"
+    # Форматирование чисел вместо strftime: путь строится для каждого дня периода
+    year = f"{date.year:04d}"
+    month = f"{date.month:02d}"
+    return DAILY_DIR / year / month / f"{year}-{month}-{date.day:02d}.md"
 
 
 def count_evidence_from_reflection(reflection_data):
@@ -85,117 +95,141 @@ def calculate_tactics_percentage(reflection_data):
     return 0
 
 
-def update_goal_metrics(goal_path, reflection_data, date):
-    """Обновить метрики в файле цели."""
-    with open(goal_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def update_goal_metrics(goal_path, reflection_data, date, pending_goals=None):
+    """
+    Обновить метрики в файле цели.
+
+    Если передан pending_goals ({путь цели: содержимое}), изменённое
+    содержимое накапливается в нём, а запись откладывается до
+    write_pending_goals.
+    """
+    evidence_count = count_evidence_from_reflection(reflection_data)
+    operations_percent = calculate_operations_percentage(reflection_data)
+
+    # Без доказательств и выполнения операций обновлять нечего — файл не читаем
+    if evidence_count == 0 and operations_percent <= 0:
+        logging.info("Нет изменений для %s", goal_path)
+        return False
+
+    if pending_goals is not None and goal_path in pending_goals:
+        content = pending_goals[goal_path]
+    else:
+        content = read_text_file(goal_path)
 
     updated = False
+    replacements = {}
 
     # 1. Обновить Identity Evidence List
-    evidence_count = count_evidence_from_reflection(reflection_data)
     if evidence_count > 0:
         # Найти текущий прогресс
-        evidence_pattern = r'\*\*Текущий прогресс:\*\* (\d+)/10'
-        evidence_match = re.search(evidence_pattern, content)
+        evidence_match = _EVIDENCE_RE.search(content)
 
         if evidence_match:
             current_progress = int(evidence_match.group(1))
             new_progress = min(10, current_progress + evidence_count)
 
-            content = re.sub(
-                evidence_pattern,
-                f'**Текущий прогресс:** {new_progress}/10',
-                content
-            )
+            replacements['evidence'] = f'**Текущий прогресс:** {new_progress}/10'
             updated = True
-            logging.info(f"Identity Evidence: {current_progress} → {new_progress} (+{evidence_count})")
+            logging.info("Identity Evidence: %d → %d (+%d)", current_progress, new_progress, evidence_count)
 
     # 2. Обновить Daily Habits Tracker - Выполнение
-    operations_percent = calculate_operations_percentage(reflection_data)
     if operations_percent > 0:
         # Обновить процент выполнения
-        habits_pattern = r'\*\*Выполнение:\*\* (\d+)%'
-        content = re.sub(
-            habits_pattern,
-            f'**Выполнение:** {operations_percent}%',
-            content
-        )
+        replacements['habits'] = f'**Выполнение:** {operations_percent}%'
         updated = True
-        logging.info(f"Выполнение операций: {operations_percent}%")
+        logging.info("Выполнение операций: %s%%", operations_percent)
 
     # 3. Обновить Последнее обновление
     today = datetime.now().strftime("%Y-%m-%d")
-    content = re.sub(
-        r'\*\*Последнее обновление:\*\* \d{4}-\d{2}-\d{2}',
-        f'**Последнее обновление:** {today}',
-        content
-    )
+    replacements['last_update'] = f'**Последнее обновление:** {today}'
 
     # 4. Добавить запись в ИСТОРИЯ ИЗМЕНЕНИЙ
+    history_entry = None
     if updated:
         history_entry = f"""- {today}: [PROGRESS] Автообновление метрик на основе рефлексии за {date.strftime("%Y-%m-%d")}
   - **Детали:** Обновлены метрики: доказательств идентичности +{evidence_count}, выполнение операций {operations_percent}%
 """
 
-        # Найти секцию ИСТОРИЯ ИЗМЕНЕНИЙ и добавить запись
-        history_pattern = r'(## ИСТОРИЯ ИЗМЕНЕНИЙ\s*\n)'
-        if re.search(history_pattern, content):
-            content = re.sub(
-                history_pattern,
-                f'\\1\n{history_entry}\n',
-                content
-            )
-        else:
-            # Если секции нет, добавить в конец
-            content += f"\n## ИСТОРИЯ ИЗМЕНЕНИЙ\n\n{history_entry}\n"
+    # Все замены выполняются за один проход по содержимому
+    history_found = False
+
+    def replace(match):
+        nonlocal history_found
+        kind = match.lastgroup
+        if kind == 'history':
+            if history_entry is None:
+                return match.group()
+            history_found = True
+            return f"{match.group()}\n{history_entry}\n"
+        return replacements.get(kind, match.group())
+
+    content = _GOAL_METRICS_RE.sub(replace, content)
+
+    if history_entry is not None and not history_found:
+        # Если секции нет, добавить в конец
+        content += f"\n## ИСТОРИЯ ИЗМЕНЕНИЙ\n\n{history_entry}\n"
 
     # Сохранить обновленный файл
     if updated:
-        with open(goal_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        logging.info(f"Файл обновлен: {goal_path}")
+        if pending_goals is not None:
+            pending_goals[goal_path] = content
+        else:
+            write_text_file(goal_path, content)
+            logging.info("Файл обновлен: %s", goal_path)
         return True
     else:
-        logging.info(f"Нет изменений для {goal_path}")
+        logging.info("Нет изменений для %s", goal_path)
         return False
 
 
-def update_metrics_for_date(date):
-    """Обновить метрики за конкретную дату."""
-    logging.info(f"Обработка рефлексии за {date.strftime('%Y-%m-%d')}")
+def write_pending_goals(pending_goals):
+    """Записать накопленное содержимое файлов целей."""
+    for goal_path, content in pending_goals.items():
+        write_text_file(goal_path, content)
+        logging.info("Файл обновлен: %s", goal_path)
+
+
+def update_metrics_for_date(date, active_goals=None, pending_goals=None):
+    """
+    Обновить метрики за конкретную дату.
+
+    active_goals — уже найденные активные цели, pending_goals — накопитель
+    отложенной записи целей (см. update_goal_metrics).
+    """
+    logging.info("Обработка рефлексии за %04d-%02d-%02d", date.year, date.month, date.day)
 
     # Получить путь к рефлексии
     reflection_path = get_reflection_path(date)
 
     if not reflection_path.exists():
-        logging.warning(f"Рефлексия не найдена: {reflection_path}")
+        logging.warning("Рефлексия не найдена: %s", reflection_path)
         return False
 
     # Парсить рефлексию
     try:
         reflection_data = parse_reflection_file(reflection_path)
     except Exception as e:
-        logging.error(f"Ошибка парсинга рефлексии: {e}")
+        logging.error("Ошибка парсинга рефлексии: %s", e)
         return False
 
     # Получить активные цели
-    active_goals = get_active_goals()
+    if active_goals is None:
+        active_goals = get_active_goals()
 
     if not active_goals:
         logging.warning("Нет активных целей для обновления")
         return False
 
-    logging.info(f"Найдено активных целей: {len(active_goals)}")
+    logging.info("Найдено активных целей: %d", len(active_goals))
 
     # Обновить каждую цель
     updated_count = 0
     for goal_path in active_goals:
-        logging.info(f"Обработка цели: {goal_path.stem}")
-        if update_goal_metrics(goal_path, reflection_data, date):
+        logging.info("Обработка цели: %s", goal_path.stem)
+        if update_goal_metrics(goal_path, reflection_data, date, pending_goals):
             updated_count += 1
 
-    logging.info(f"Обновлено целей: {updated_count}/{len(active_goals)}")
+    logging.info("Обновлено целей: %d/%d", updated_count, len(active_goals))
     return updated_count > 0
 
 
@@ -203,30 +237,43 @@ def update_metrics_for_period(period_days):
     """Обновить метрики за период."""
     today = datetime.now()
 
+    # Список активных целей не меняется за время обновления
+    active_goals = get_active_goals()
+
+    # Изменения всех дней применяются к содержимому целей в памяти,
+    # и каждый файл цели записывается один раз в конце
+    pending_goals = {}
+
     for i in range(period_days):
         date = today - timedelta(days=i)
-        update_metrics_for_date(date)
+        update_metrics_for_date(date, active_goals, pending_goals=pending_goals)
+
+    write_pending_goals(pending_goals)
 
 
 def main():
     """Главная функция."""
+    import argparse
+
     parser = argparse.ArgumentParser(description='Автообновление метрик целей из рефлексий')
     parser.add_argument('--date', type=str, help='Дата в формате YYYY-MM-DD (по умолчанию сегодня)')
     parser.add_argument('--period', type=str, choices=['week', 'month'], help='Обновить за период')
+    parser.add_argument('--log-file', action='store_true',
+                        help='Писать лог в logs/ (при --period включено всегда)')
 
     args = parser.parse_args()
 
-    # Настройка логирования
-    today = datetime.now().strftime("%Y-%m-%d")
-    LOGS_DIR.mkdir(exist_ok=True)
+    # Настройка логирования: файл лога нужен только по запросу и для периода
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if args.log_file or args.period:
+        today = datetime.now().strftime("%Y-%m-%d")
+        LOGS_DIR.mkdir(exist_ok=True)
+        handlers.insert(0, logging.FileHandler(LOGS_DIR / f"metrics_update_{today}.log", encoding='utf-8'))
 
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(LOGS_DIR / f"metrics_update_{today}.log", encoding='utf-8'),
-            logging.StreamHandler(sys.stdout)
-        ]
+        handlers=handlers
     )
 
     try:
@@ -235,7 +282,7 @@ def main():
         if args.period:
             # Обновить за период
             period_days = 7 if args.period == 'week' else 30
-            logging.info(f"Обновление за период: {period_days} дней")
+            logging.info("Обновление за период: %d дней", period_days)
             update_metrics_for_period(period_days)
         else:
             # Обновить за конкретную дату
@@ -252,7 +299,7 @@ def main():
         logging.info("Завершено")
 
     except Exception as e:
-        logging.error(f"Критическая ошибка: {e}", exc_info=True)
+        logging.error("Критическая ошибка: %s", e, exc_info=True)
         sys.exit(1)
 
 
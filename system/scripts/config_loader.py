@@ -8,6 +8,8 @@
 - Получение путей к директориям (goals, reflections, dashboards и т.д.)
 - Загрузку переменных окружения из .env
 - Загрузку конфигурационных файлов
+- Чтение и атомарную запись текстовых файлов данных (цели, рефлексии)
+- Загрузку и сохранение версионированных JSON-кэшей в .cache/
 
 Использование:
     from config_loader import get_project_root, get_path, load_user_settings
@@ -17,16 +19,37 @@
     settings = load_user_settings()
 """
 
+import copy
+import json
+import mmap
 import os
+import stat
 import sys
+import tempfile
 from pathlib import Path
-from typing import Dict, Any, Optional
-import yaml
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
 
 # Определение корня проекта относительно этого файла
 # system/scripts/config_loader.py -> plan_expo/
 _PROJECT_ROOT = Path(__file__).parent.parent.parent
 
+# Файлы от этого размера читаются через mmap
+MMAP_THRESHOLD = 256 * 1024
+
+# Настройки из user_settings.yaml, разобранные при первом обращении
+_settings_cache: Optional[Dict[str, Any]] = None
+
+# Абсолютные пути из настроек (только для чтения), вычисленные при первом обращении
+_paths_cache: Optional[Mapping[str, Path]] = None
+
+# Переменные из .env, загруженные при первом обращении
+_env_cache: Optional[Dict[str, str]] = None
+
+# Классы загрузчика и дампера YAML (C-версии при наличии libyaml), выбранные при первом обращении
+_yaml_loader: Optional[type] = None
+_yaml_dumper: Optional[type] = None
+
 
 def get_project_root() -> Path:
     """
@@ -52,41 +75,52 @@ def load_env_vars() -> Dict[str, str]:
     """
     Загрузить переменные окружения из .env файла.
 
+    Файл читается один раз за процесс, повторные вызовы возвращают
+    уже загруженные переменные.
+
     Returns:
         Dict[str, str]: Словарь с переменными окружения
     """
+    global _env_cache
+
+    if _env_cache is not None:
+        return _env_cache
+
     env_vars = {}
     env_file = _PROJECT_ROOT / ".env"
 
     if not env_file.exists():
+        _env_cache = env_vars
         return env_vars
 
     try:
-        with open(env_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                # Пропускаем комментарии и пустые строки
-                if not line or line.startswith('#'):
-                    continue
-
-                # Парсим KEY=VALUE
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
-
-                    # Убираем кавычки если есть
-                    if value.startswith('"') and value.endswith('"'):
-                        value = value[1:-1]
-                    elif value.startswith("'") and value.endswith("'"):
-                        value = value[1:-1]
-
-                    env_vars[key] = value
-                    # Устанавливаем в os.environ для совместимости
-                    os.environ[key] = value
+        for line in read_text_file(env_file).split('\n'):
+            line = line.strip()
+            # Пропускаем комментарии и пустые строки
+            if not line or line.startswith('#'):
+                continue
+
+            # Парсим KEY=VALUE
+            if '=' in line:
+                key, value = line.split('=', 1)
+                key = key.strip()
+                value = value.strip()
+
+                # Убираем кавычки если есть
+                if value.startswith('"') and value.endswith('"'):
+                    value = value[1:-1]
+                elif value.startswith("'") and value.endswith("'"):
+                    value = value[1:-1]
+
+                env_vars[key] = value
+                # Устанавливаем в os.environ для совместимости
+                os.environ[key] = value
     except Exception as e:
         print(f"⚠️  Ошибка при загрузке .env: {e}", file=sys.stderr)
+        return env_vars
 
+    # Кэшируем только полностью разобранный файл
+    _env_cache = env_vars
     return env_vars
 
 
@@ -95,6 +129,32 @@ def load_user_settings() -> Dict[str, Any]:
     Загрузить пользовательские настройки из config/user_settings.yaml.
 
     Если файл не существует, возвращает настройки по умолчанию.
+    Файл разбирается один раз за процесс; каждый вызов возвращает
+    собственную копию, поэтому её можно изменять.
+
+    Returns:
+        Dict[str, Any]: Словарь с настройками пользователя
+    """
+    return copy.deepcopy(_get_settings())
+
+
+def _get_settings() -> Dict[str, Any]:
+    """
+    Получить разобранные настройки без копирования (только для чтения).
+
+    Returns:
+        Dict[str, Any]: Общий для процесса словарь с настройками
+    """
+    global _settings_cache
+
+    if _settings_cache is None:
+        _settings_cache = _read_user_settings()
+    return _settings_cache
+
+
+def _read_user_settings() -> Dict[str, Any]:
+    """
+    Прочитать config/user_settings.yaml или вернуть настройки по умолчанию.
 
     Returns:
         Dict[str, Any]: Словарь с настройками пользователя
@@ -128,10 +188,13 @@ def load_user_settings() -> Dict[str, Any]:
     if not settings_file.exists():
         return default_settings
 
+    # PyYAML импортируется только когда нужно разобрать файл:
+    # импорт заметно замедляет запуск скриптов
+    import yaml
+
     # Загрузить настройки из файла
     try:
-        with open(settings_file, 'r', encoding='utf-8') as f:
-            settings = yaml.safe_load(f)
+        settings = yaml.load(read_text_file(settings_file), Loader=get_yaml_loader())
 
         # Обновить root path если он null или не задан
         if settings.get('project', {}).get('root') is None:
@@ -144,6 +207,48 @@ def load_user_settings() -> Dict[str, Any]:
         return default_settings
 
 
+def get_yaml_loader() -> type:
+    """
+    Получить безопасный загрузчик YAML.
+
+    Если PyYAML собран с libyaml, используется CSafeLoader (в разы быстрее),
+    иначе SafeLoader — тот же загрузчик, что и в yaml.safe_load.
+
+    Returns:
+        type: Класс загрузчика для yaml.load
+    """
+    global _yaml_loader
+
+    if _yaml_loader is None:
+        try:
+            from yaml import CSafeLoader as loader
+        except ImportError:
+            from yaml import SafeLoader as loader
+        _yaml_loader = loader
+    return _yaml_loader
+
+
+def get_yaml_dumper() -> type:
+    """
+    Получить безопасный дампер YAML.
+
+    Если PyYAML собран с libyaml, используется CSafeDumper,
+    иначе SafeDumper — тот же дампер, что и в yaml.safe_dump.
+
+    Returns:
+        type: Класс дампера для yaml.dump
+    """
+    global _yaml_dumper
+
+    if _yaml_dumper is None:
+        try:
+            from yaml import CSafeDumper as dumper
+        except ImportError:
+            from yaml import SafeDumper as dumper
+        _yaml_dumper = dumper
+    return _yaml_dumper
+
+
 def get_path(path_name: str) -> Path:
     """
     Получить абсолютный путь к директории по имени.
@@ -157,13 +262,12 @@ def get_path(path_name: str) -> Path:
     Raises:
         KeyError: Если path_name не найден в конфигурации
     """
-    settings = load_user_settings()
+    paths = get_paths_snapshot()
 
-    if path_name not in settings.get('paths', {}):
+    if path_name not in paths:
         raise KeyError(f"Путь '{path_name}' не найден в конфигурации user_settings.yaml")
 
-    relative_path = settings['paths'][path_name]
-    return _PROJECT_ROOT / relative_path
+    return paths[path_name]
 
 
 def get_all_paths() -> Dict[str, Path]:
@@ -173,13 +277,28 @@ def get_all_paths() -> Dict[str, Path]:
     Returns:
         Dict[str, Path]: Словарь {имя: абсолютный_путь}
     """
-    settings = load_user_settings()
-    paths = {}
+    return dict(get_paths_snapshot())
 
-    for name, relative_path in settings.get('paths', {}).items():
-        paths[name] = _PROJECT_ROOT / relative_path
 
-    return paths
+def get_paths_snapshot() -> Mapping[str, Path]:
+    """
+    Получить все пути из конфигурации без копирования.
+
+    Пути вычисляются один раз и возвращаются как неизменяемое
+    отображение, поэтому повторные обращения не пересобирают Path.
+
+    Returns:
+        Mapping[str, Path]: Отображение {имя: абсолютный_путь} только для чтения
+    """
+    global _paths_cache
+
+    if _paths_cache is None:
+        settings = _get_settings()
+        _paths_cache = MappingProxyType({
+            name: _PROJECT_ROOT / relative_path
+            for name, relative_path in settings.get('paths', {}).items()
+        })
+    return _paths_cache
 
 
 def load_config(config_name: str) -> Optional[Dict[str, Any]]:
@@ -200,15 +319,129 @@ def load_config(config_name: str) -> Optional[Dict[str, Any]]:
         if not config_file.exists():
             return None
 
+    import yaml
+
     try:
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+        config = yaml.load(read_text_file(config_file), Loader=get_yaml_loader())
         return config
     except Exception as e:
         print(f"⚠️  Ошибка при загрузке {config_name}.yaml: {e}", file=sys.stderr)
         return None
 
 
+def read_text_file(path: Path) -> str:
+    """
+    Прочитать текстовый файл в UTF-8 целиком.
+
+    Файл читается в бинарном режиме одним вызовом, крупные файлы
+    (от MMAP_THRESHOLD) отображаются в память через mmap. Переводы строк
+    приводятся к LF, как при чтении в текстовом режиме.
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        str: Содержимое файла
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < MMAP_THRESHOLD:
+            content = f.read().decode('utf-8')
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Декодируем прямо из отображения, без промежуточной копии в bytes
+                content = str(mm, 'utf-8')
+
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
+
+def write_text_file(path: Path, content: str) -> None:
+    """
+    Атомарно записать текстовый файл в UTF-8.
+
+    Содержимое пишется во временный файл с уникальным именем рядом
+    с целевым и затем подменяет его через os.replace, поэтому при сбое
+    во время записи старая версия файла остаётся нетронутой, а
+    параллельные запуски не затирают временные файлы друг друга.
+    Права существующего файла сохраняются.
+
+    Args:
+        path: Путь к файлу
+        content: Новое содержимое
+    """
+    path = Path(path)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name + '.',
+                                     suffix='.tmp', delete=False) as tmp:
+        tmp_path = Path(tmp.name)
+        try:
+            # Кодируем один раз и пишем байты без текстового слоя
+            tmp.write(content.encode('utf-8'))
+        except BaseException:
+            tmp.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    try:
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            # Новый файл: права по umask, как при обычном open(..., 'w')
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def load_json_cache(path: Path, version: int) -> Dict[str, Any]:
+    """
+    Загрузить записи версионированного JSON-кэша.
+
+    Кэш хранится в виде {'version': version, 'entries': {...}}. Отсутствующий,
+    повреждённый или записанный другой версией кэш считается пустым.
+
+    Args:
+        path: Путь к файлу кэша
+        version: Ожидаемая версия формата записей
+
+    Returns:
+        Dict[str, Any]: Записи кэша
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(cache, dict) or cache.get('version') != version:
+        return {}
+    return cache.get('entries', {})
+
+
+def save_json_cache(path: Path, version: int, entries: Dict[str, Any]) -> None:
+    """
+    Атомарно сохранить записи версионированного JSON-кэша.
+
+    Ошибка записи не прерывает работу скрипта: кэш лишь ускоряет
+    повторные запуски, поэтому выводится только предупреждение.
+
+    Args:
+        path: Путь к файлу кэша
+        version: Версия формата записей
+        entries: Записи кэша
+    """
+    path = Path(path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_text_file(path, json.dumps({'version': version, 'entries': entries}, ensure_ascii=False))
+    except OSError as e:
+        print(f"⚠️  Не удалось сохранить кэш {path.name}: {e}", file=sys.stderr)
+
+
 def get_timezone() -> str:
     """
     Получить часовой пояс пользователя из настроек.
@@ -216,7 +449,7 @@ def get_timezone() -> str:
     Returns:
         str: Часовой пояс (например, 'UTC', 'Europe/Moscow')
     """
-    settings = load_user_settings()
+    settings = _get_settings()
     return settings.get('project', {}).get('timezone', 'UTC')
 
 
@@ -227,7 +460,7 @@ def get_project_name() -> str:
     Returns:
         str: Название проекта
     """
-    settings = load_user_settings()
+    settings = _get_settings()
     return settings.get('project', {}).get('name', 'My Plan Expo')
 
 
@@ -238,7 +471,7 @@ def should_commit_user_data() -> bool:
     Returns:
         bool: True если нужно коммитить, False иначе
     """
-    settings = load_user_settings()
+    settings = _get_settings()
     return settings.get('git', {}).get('commit_user_data', False)
 
 
@@ -249,7 +482,7 @@ def should_auto_commit() -> bool:
     Returns:
         bool: True если авто-коммит включен, False иначе
     """
-    settings = load_user_settings()
+    settings = _get_settings()
     return settings.get('git', {}).get('auto_commit', True)
 
 
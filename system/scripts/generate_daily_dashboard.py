@@ -22,207 +22,40 @@ import sys
 SCRIPT_DIR = Path(__file__).parent
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from config_loader import get_project_root, get_path
+from config_loader import get_project_root, get_path, load_json_cache, save_json_cache, write_text_file
 from datetime import datetime, timedelta
 import argparse
+from functools import lru_cache
 from string import Template
 
 # Импорт функций
 sys.path.append(str(Path(__file__).parent))
-from analyze_reflection import parse_reflection_file
+from analyze_reflection import list_reflection_files, parse_reflection_file, try_parse_reflection_file
+
+# orjson разбирает JSON заметно быстрее; без него используется стандартный json
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 # Пути
 PROJECT_ROOT = get_project_root()
 REFLECTIONS_DIR = get_path("reflections")
 DAILY_DIR = REFLECTIONS_DIR / "daily"
-DASHBOARDS_DIR = get_path("dashboards") / "daily"
-STREAKS_DIR = get_path("dashboards") / "streaks"
-
-
-def get_reflection_path(date):
-    """Получить путь к рефлексии."""
-    year = date.strftime("%Y")
-    month = date.strftime("%m")
-    filename = date.strftime("%Y-%m-%d")
-    return DAILY_DIR / year / month / f"{filename}.md"
-
-
-def load_streaks_data():
-    """Загрузить данные о streaks."""
-    streaks_file = STREAKS_DIR / "streaks_data.json"
-    if streaks_file.exists():
-        with open(streaks_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {'habits': []}
-
-
-def calculate_metrics(reflection_data):
-    """Вычислить показатели из рефлексии."""
-    # Операции
-    operations_percent = reflection_data.get('operations_percent', 0)
-    if operations_percent == 0:
-        # Вычислить из выполненных операций
-        operations_done = len(reflection_data.get('operations_done', []))
-        operations_percent = min(100, int((operations_done / 8) * 100))
+DASHBOARDS_ROOT = get_path("dashboards")
+DASHBOARDS_DIR = DASHBOARDS_ROOT / "daily"
+STREAKS_DIR = DASHBOARDS_ROOT / "streaks"
 
-    # Тактика
-    tactics_percent = reflection_data.get('tactics_percent', 0)
+# Кэш показателей трендов: рефлексия разбирается заново, только если у файла
+# изменились mtime или размер
+TRENDS_CACHE_FILE = PROJECT_ROOT / ".cache" / "trends.json"
+TRENDS_CACHE_VERSION = 1
 
-    # Доказательства
-    evidence_count = len(reflection_data.get('evidence_done', []))
+# Подпись на оси X графика трендов
+SVG_LABEL_TEMPLATE = '<text x="{x}" y="{y}" text-anchor="middle" font-size="11" fill="#666">{date}</text>\n'
 
-    # Оценки
-    rating = reflection_data.get('rating', 0)
-    energy = reflection_data.get('energy', 'средняя')
-    motivation = reflection_data.get('motivation', 'средняя')
-    focus = reflection_data.get('focus', 'средний')
-
-    return {
-        'operations_percent': operations_percent,
-        'tactics_percent': tactics_percent,
-        'evidence_count': evidence_count,
-        'rating': rating,
-        'energy': energy,
-        'motivation': motivation,
-        'focus': focus
-    }
-
-
-def get_color_for_percentage(percent):
-    """Получить цвет для процента."""
-    if percent is None:
-        percent = 0
-    if percent >= 80:
-        return '#34c759'  # Зеленый
-    elif percent >= 60:
-        return '#ffcc00'  # Желтый
-    else:
-        return '#ff3b30'  # Красный
-
-
-def calculate_trends(date, days=7):
-    """Вычислить тренды за последние дни."""
-    trends = []
-
-    for i in range(days):
-        trend_date = date - timedelta(days=days - 1 - i)
-        reflection_path = get_reflection_path(trend_date)
-
-        if reflection_path.exists():
-            try:
-                data = parse_reflection_file(reflection_path)
-                metrics = calculate_metrics(data)
-                trends.append({
-                    'date': trend_date.strftime('%d.%m'),
-                    'operations': metrics['operations_percent'],
-                    'tactics': metrics['tactics_percent']
-                })
-            except:
-                trends.append({
-                    'date': trend_date.strftime('%d.%m'),
-                    'operations': 0,
-                    'tactics': 0
-                })
-        else:
-            trends.append({
-                'date': trend_date.strftime('%d.%m'),
-                'operations': 0,
-                'tactics': 0
-            })
-
-    return trends
-
-
-def generate_svg_chart(trends, width=800, height=200):
-    """Генерировать SVG график трендов."""
-    if not trends:
-        return ""
-
-    # Параметры
-    padding = 40
-    chart_width = width - 2 * padding
-    chart_height = height - 2 * padding
-
-    # Масштабирование
-    max_value = 100
-    x_step = chart_width / (len(trends) - 1) if len(trends) > 1 else 0
-
-    # Точки для операций
-    operations_points = []
-    for i, trend in enumerate(trends):
-        x = padding + i * x_step
-        operations_value = trend['operations'] if trend['operations'] is not None else 0
-        y = padding + chart_height - (operations_value / max_value * chart_height)
-        operations_points.append(f"{x},{y}")
-
-    # Точки для тактики
-    tactics_points = []
-    for i, trend in enumerate(trends):
-        x = padding + i * x_step
-        tactics_value = trend['tactics'] if trend['tactics'] is not None else 0
-        y = padding + chart_height - (tactics_value / max_value * chart_height)
-        tactics_points.append(f"{x},{y}")
-
-    # SVG
-    svg = f'''<svg width="{width}" height="{height}" style="background: #f5f5f7; border-radius: 8px;">
-        <!-- Оси -->
-        <line x1="{padding}" y1="{padding}" x2="{padding}" y2="{padding + chart_height}" stroke="#666" stroke-width="1"/>
-        <line x1="{padding}" y1="{padding + chart_height}" x2="{padding + chart_width}" y2="{padding + chart_height}" stroke="#666" stroke-width="1"/>
-
-        <!-- Горизонтальные линии (сетка) -->
-        <line x1="{padding}" y1="{padding + chart_height * 0.25}" x2="{padding + chart_width}" y2="{padding + chart_height * 0.25}" stroke="#ddd" stroke-width="1" stroke-dasharray="5,5"/>
-        <line x1="{padding}" y1="{padding + chart_height * 0.5}" x2="{padding + chart_width}" y2="{padding + chart_height * 0.5}" stroke="#ddd" stroke-width="1" stroke-dasharray="5,5"/>
-        <line x1="{padding}" y1="{padding + chart_height * 0.75}" x2="{padding + chart_width}" y2="{padding + chart_height * 0.75}" stroke="#ddd" stroke-width="1" stroke-dasharray="5,5"/>
-
-        <!-- Метки на оси Y -->
-        <text x="{padding - 10}" y="{padding}" text-anchor="end" font-size="12" fill="#666">100%</text>
-        <text x="{padding - 10}" y="{padding + chart_height * 0.5}" text-anchor="end" font-size="12" fill="#666">50%</text>
-        <text x="{padding - 10}" y="{padding + chart_height}" text-anchor="end" font-size="12" fill="#666">0%</text>
-
-        <!-- Линия операций -->
-        <polyline points="{' '.join(operations_points)}" fill="none" stroke="#007aff" stroke-width="3"/>
-
-        <!-- Линия тактики -->
-        <polyline points="{' '.join(tactics_points)}" fill="none" stroke="#ff6b35" stroke-width="3"/>
-
-        <!-- Метки на оси X -->
-'''
-
-    for i, trend in enumerate(trends):
-        x = padding + i * x_step
-        svg += f'<text x="{x}" y="{padding + chart_height + 20}" text-anchor="middle" font-size="11" fill="#666">{trend["date"]}</text>\n'
-
-    # Легенда
-    svg += f'''
-        <!-- Легенда -->
-        <rect x="{width - 150}" y="10" width="15" height="15" fill="#007aff"/>
-        <text x="{width - 130}" y="22" font-size="12" fill="#333">Операции</text>
-
-        <rect x="{width - 150}" y="30" width="15" height="15" fill="#ff6b35"/>
-        <text x="{width - 130}" y="42" font-size="12" fill="#333">Тактика</text>
-    </svg>'''
-
-    return svg
-
-
-def generate_html_dashboard(date, metrics, trends, streaks_data):
-    """Генерировать HTML дашборд."""
-
-    # Вычислить общий streak
-    current_streak = 0
-    if streaks_data and streaks_data.get('habits'):
-        # Взять максимальный streak
-        current_streak = max((h.get('current_streak', 0) for h in streaks_data['habits']), default=0)
-
-    # Цвета для прогресс-баров
-    operations_color = get_color_for_percentage(metrics['operations_percent'])
-    tactics_color = get_color_for_percentage(metrics['tactics_percent'])
-
-    # SVG график
-    svg_chart = generate_svg_chart(trends)
-
-    # HTML
-    html_template = Template('''<!DOCTYPE html>
+# Шаблон HTML дашборда собирается один раз при импорте
+_HTML_TEMPLATE = Template('''<!DOCTYPE html>
 <html lang="ru">
 <head>
     <meta charset="UTF-8">
@@ -407,6 +240,245 @@ def generate_html_dashboard(date, metrics, trends, streaks_data):
 </body>
 </html>''')
 
+
+def get_reflection_path(date):
+    """Получить путь к рефлексии."""
+    # Форматирование чисел вместо strftime: путь строится для каждого дня трендов
+    year = f"{date.year:04d}"
+    month = f"{date.month:02d}"
+    return DAILY_DIR / year / month / f"{year}-{month}-{date.day:02d}.md"
+
+
+def load_streaks_data():
+    """Загрузить данные о streaks."""
+    streaks_file = STREAKS_DIR / "streaks_data.json"
+    if streaks_file.exists():
+        return json_loads(streaks_file.read_bytes())
+    return {'habits': []}
+
+
+def calculate_metrics(reflection_data):
+    """Вычислить показатели из рефлексии."""
+    # Операции
+    operations_percent = reflection_data.get('operations_percent', 0)
+    if operations_percent == 0:
+        # Вычислить из выполненных операций
+        operations_done = len(reflection_data.get('operations_done', []))
+        operations_percent = min(100, int((operations_done / 8) * 100))
+
+    # Тактика
+    tactics_percent = reflection_data.get('tactics_percent', 0)
+
+    # Доказательства
+    evidence_count = len(reflection_data.get('evidence_done', []))
+
+    # Оценки
+    rating = reflection_data.get('rating', 0)
+    energy = reflection_data.get('energy', 'средняя')
+    motivation = reflection_data.get('motivation', 'средняя')
+    focus = reflection_data.get('focus', 'средний')
+
+    return {
+        'operations_percent': operations_percent,
+        'tactics_percent': tactics_percent,
+        'evidence_count': evidence_count,
+        'rating': rating,
+        'energy': energy,
+        'motivation': motivation,
+        'focus': focus
+    }
+
+
+def calculate_trend_metrics(reflection_data):
+    """Вычислить только проценты операций и тактики — всё, что нужно для трендов."""
+    operations_percent = reflection_data.get('operations_percent', 0)
+    if operations_percent == 0:
+        operations_done = len(reflection_data.get('operations_done', []))
+        operations_percent = min(100, int((operations_done / 8) * 100))
+
+    return operations_percent, reflection_data.get('tactics_percent', 0)
+
+
+def get_color_for_percentage(percent):
+    """Получить цвет для процента."""
+    if percent is None:
+        percent = 0
+    if percent >= 80:
+        return '#34c759'  # Зеленый
+    elif percent >= 60:
+        return '#ffcc00'  # Желтый
+    else:
+        return '#ff3b30'  # Красный
+
+
+def calculate_trends(date, days=7):
+    """Вычислить тренды за последние дни."""
+    trends = []
+
+    # Тренды считаются по дням: арифметика date дешевле, чем datetime
+    end_date = date.date() if isinstance(date, datetime) else date
+
+    # Один листинг на месяц вместо проверки exists() для каждого дня
+    trend_dates = [end_date - timedelta(days=days - 1 - i) for i in range(days)]
+    existing = list_reflection_files(trend_dates)
+    reflection_paths = [get_reflection_path(trend_date) for trend_date in trend_dates]
+
+    # Показатели неизменённых рефлексий берутся из кэша
+    cache = load_json_cache(TRENDS_CACHE_FILE, TRENDS_CACHE_VERSION)
+    cached = {}
+    miss_stats = {}
+    for path in reflection_paths:
+        if path.name not in existing:
+            continue
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entry = cache.get(str(path))
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            cached[path] = entry
+        else:
+            miss_stats[path] = stat
+
+    # Кэш собирается заново только из дней текущего окна, чтобы не расти без границ
+    entries = {}
+    for trend_date, reflection_path in zip(trend_dates, reflection_paths):
+        operations = tactics = 0
+        if reflection_path in cached:
+            entry = cached[reflection_path]
+            operations, tactics = entry['operations'], entry['tactics']
+            entries[str(reflection_path)] = entry
+        elif reflection_path.name in existing:
+            data = try_parse_reflection_file(reflection_path)
+
+            if data is not None:
+                operations, tactics = calculate_trend_metrics(data)
+
+                stat = miss_stats.get(reflection_path)
+                if stat is not None:
+                    entries[str(reflection_path)] = {
+                        'mtime_ns': stat.st_mtime_ns,
+                        'size': stat.st_size,
+                        'operations': operations,
+                        'tactics': tactics
+                    }
+
+        trends.append({
+            'date': f"{trend_date.day:02d}.{trend_date.month:02d}",
+            'operations': operations,
+            'tactics': tactics
+        })
+
+    if entries != cache:
+        save_json_cache(TRENDS_CACHE_FILE, TRENDS_CACHE_VERSION, entries)
+
+    return trends
+
+
+@lru_cache(maxsize=None)
+def get_svg_frame(width, height, padding):
+    """Статические части SVG графика (оси, сетка, легенда) для заданных размеров."""
+    chart_width = width - 2 * padding
+    chart_height = height - 2 * padding
+
+    axes = f'''<svg width="{width}" height="{height}" style="background: #f5f5f7; border-radius: 8px;">
+        <!-- Оси -->
+        <line x1="{padding}" y1="{padding}" x2="{padding}" y2="{padding + chart_height}" stroke="#666" stroke-width="1"/>
+        <line x1="{padding}" y1="{padding + chart_height}" x2="{padding + chart_width}" y2="{padding + chart_height}" stroke="#666" stroke-width="1"/>
+
+        <!-- Горизонтальные линии (сетка) -->
+        <line x1="{padding}" y1="{padding + chart_height * 0.25}" x2="{padding + chart_width}" y2="{padding + chart_height * 0.25}" stroke="#ddd" stroke-width="1" stroke-dasharray="5,5"/>
+        <line x1="{padding}" y1="{padding + chart_height * 0.5}" x2="{padding + chart_width}" y2="{padding + chart_height * 0.5}" stroke="#ddd" stroke-width="1" stroke-dasharray="5,5"/>
+        <line x1="{padding}" y1="{padding + chart_height * 0.75}" x2="{padding + chart_width}" y2="{padding + chart_height * 0.75}" stroke="#ddd" stroke-width="1" stroke-dasharray="5,5"/>
+
+        <!-- Метки на оси Y -->
+        <text x="{padding - 10}" y="{padding}" text-anchor="end" font-size="12" fill="#666">100%</text>
+        <text x="{padding - 10}" y="{padding + chart_height * 0.5}" text-anchor="end" font-size="12" fill="#666">50%</text>
+        <text x="{padding - 10}" y="{padding + chart_height}" text-anchor="end" font-size="12" fill="#666">0%</text>
+
+'''
+
+    legend = f'''
+        <!-- Легенда -->
+        <rect x="{width - 150}" y="10" width="15" height="15" fill="#007aff"/>
+        <text x="{width - 130}" y="22" font-size="12" fill="#333">Операции</text>
+
+        <rect x="{width - 150}" y="30" width="15" height="15" fill="#ff6b35"/>
+        <text x="{width - 130}" y="42" font-size="12" fill="#333">Тактика</text>
+    </svg>'''
+
+    return axes, legend
+
+
+def generate_svg_chart(trends, width=800, height=200):
+    """Генерировать SVG график трендов."""
+    if not trends:
+        return ""
+
+    # Параметры
+    padding = 40
+    chart_width = width - 2 * padding
+    chart_height = height - 2 * padding
+
+    # Масштабирование
+    max_value = 100
+    x_step = chart_width / (len(trends) - 1) if len(trends) > 1 else 0
+
+    # Точки для операций и тактики за один проход
+    operations_points = []
+    tactics_points = []
+    for i, trend in enumerate(trends):
+        x = padding + i * x_step
+        operations_value = trend['operations'] if trend['operations'] is not None else 0
+        y = padding + chart_height - (operations_value / max_value * chart_height)
+        operations_points.append(f"{x},{y}")
+
+        tactics_value = trend['tactics'] if trend['tactics'] is not None else 0
+        y = padding + chart_height - (tactics_value / max_value * chart_height)
+        tactics_points.append(f"{x},{y}")
+
+    # SVG собирается из частей и склеивается один раз
+    axes, legend = get_svg_frame(width, height, padding)
+    parts = [axes, f'''        <!-- Линия операций -->
+        <polyline points="{' '.join(operations_points)}" fill="none" stroke="#007aff" stroke-width="3"/>
+
+        <!-- Линия тактики -->
+        <polyline points="{' '.join(tactics_points)}" fill="none" stroke="#ff6b35" stroke-width="3"/>
+
+        <!-- Метки на оси X -->
+''']
+
+    label_y = padding + chart_height + 20
+    parts.append(''.join(
+        SVG_LABEL_TEMPLATE.format(x=padding + i * x_step, y=label_y, date=trend['date'])
+        for i, trend in enumerate(trends)
+    ))
+
+    parts.append(legend)
+
+    return ''.join(parts)
+
+
+def get_current_streak(streaks_data):
+    """Вычислить общий streak — максимальный среди привычек."""
+    if streaks_data and streaks_data.get('habits'):
+        return max((h.get('current_streak', 0) for h in streaks_data['habits']), default=0)
+    return 0
+
+
+def generate_html_dashboard(date, metrics, trends, streaks_data):
+    """Генерировать HTML дашборд."""
+
+    # Вычислить общий streak
+    current_streak = get_current_streak(streaks_data)
+
+    # Цвета для прогресс-баров
+    operations_color = get_color_for_percentage(metrics['operations_percent'])
+    tactics_color = get_color_for_percentage(metrics['tactics_percent'])
+
+    # SVG график
+    svg_chart = generate_svg_chart(trends)
+
     # Таблица привычек
     habits_rows = ""
     if streaks_data and streaks_data.get('habits'):
@@ -416,19 +488,21 @@ def generate_html_dashboard(date, metrics, trends, streaks_data):
             reverse=True
         )[:5]
 
+        rows = []
         for habit in top_habits:
             name = habit.get('name', '')[:40]
             streak = habit.get('current_streak', 0)
             rate_7d = habit.get('completion_rate_7d', 0)
             emoji = "🔥" if streak >= 7 else "⚡" if streak >= 3 else "💪"
 
-            habits_rows += f'<tr><td>{name}...</td><td>{emoji} {streak}</td><td>{rate_7d}%</td></tr>\n'
+            rows.append(f'<tr><td>{name}...</td><td>{emoji} {streak}</td><td>{rate_7d}%</td></tr>\n')
+        habits_rows = ''.join(rows)
 
     if not habits_rows:
         habits_rows = '<tr><td colspan="3">Нет данных о привычках</td></tr>'
 
     # Подставить значения
-    html = html_template.substitute(
+    html = _HTML_TEMPLATE.substitute(
         date_formatted=date.strftime('%d.%m.%Y'),
         current_streak=current_streak,
         operations_percent=metrics['operations_percent'],
@@ -487,7 +561,8 @@ def main():
     else:
         date = datetime.now()
 
-    print(f"Генерация дашборда за {date.strftime('%Y-%m-%d')}...\n")
+    date_str = f"{date.year:04d}-{date.month:02d}-{date.day:02d}"
+    print(f"Генерация дашборда за {date_str}...\n")
 
     # Загрузить рефлексию
     reflection_path = get_reflection_path(date)
@@ -514,12 +589,12 @@ def main():
     # Генерировать HTML
     html = generate_html_dashboard(date, metrics, trends, streaks_data)
 
-    # Сохранить HTML
+    # Директория создаётся один раз для обоих файлов дашборда
     DASHBOARDS_DIR.mkdir(parents=True, exist_ok=True)
-    html_path = DASHBOARDS_DIR / f"{date.strftime('%Y-%m-%d')}.html"
 
-    with open(html_path, 'w', encoding='utf-8') as f:
-        f.write(html)
+    # Сохранить HTML
+    html_path = DASHBOARDS_DIR / f"{date_str}.html"
+    write_text_file(html_path, html)
 
     print(f"✅ HTML дашборд: {html_path}")
 
@@ -527,12 +602,19 @@ def main():
     markdown = generate_markdown_dashboard(date, metrics, trends)
 
     # Сохранить markdown
-    md_path = DASHBOARDS_DIR / f"{date.strftime('%Y-%m-%d')}.md"
-
-    with open(md_path, 'w', encoding='utf-8') as f:
-        f.write(markdown)
+    md_path = DASHBOARDS_DIR / f"{date_str}.md"
+    write_text_file(md_path, markdown)
 
     print(f"✅ Markdown дашборд: {md_path}")
+
+    # Сохранить метрики для notification_system, чтобы не разбирать markdown
+    metrics_path = DASHBOARDS_DIR / f"{date_str}.metrics.json"
+    write_text_file(metrics_path, json.dumps({
+        'operations': metrics['operations_percent'],
+        'tactics': metrics['tactics_percent'],
+        'streak': get_current_streak(streaks_data)
+    }))
+
     print("\n🎉 Дашборд создан успешно!")
 
 
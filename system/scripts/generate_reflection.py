@@ -13,7 +13,8 @@ import sys
 SCRIPT_DIR = Path(__file__).parent
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from config_loader import get_project_root, get_path
+from config_loader import get_project_root, get_path, read_text_file, write_text_file
+from goal_cache import parse_goals_cached, read_goal_status
 import json
 import re
 
@@ -23,10 +24,34 @@ GOALS_DIR = get_path("goals")
 REFLECTIONS_DIR = get_path("reflections")
 DAILY_DIR = REFLECTIONS_DIR / "daily"
 
+# Секции-списки файла цели: заголовок -> путь к полю в goal_data
+_LIST_SECTIONS = {
+    '**Убеждения:**': ('beliefs',),
+    '**Доказательства идентичности:**': ('evidence',),
+    '### Implementation Intentions:': ('operations', 'if_then'),
+    '### Tiny Habits:': ('operations', 'tiny_habits'),
+    '### Key Results:': ('tactics', 'key_results'),
+}
+
+# Однострочные поля: префикс строки -> ключ в goal_data
+_LINE_FIELDS = {
+    '**Статус:**': 'status',
+    '**Идентичность:**': 'identity',
+}
+
+_RE_OBJECTIVE = re.compile(r'### Objective \(если OKR\):\s*\n(.+?)(?=\n###|\n\*\*|$)', re.DOTALL)
+_RE_SMART = re.compile(r'### SMART-цель \(если SMART\):\s*\n(.+?)(?=\n###|\n\*\*|$)', re.DOTALL)
+
+def _store_list_section(goal_data, path, items):
+    """Сохраняет элементы секции-списка по пути path в goal_data."""
+    target = goal_data
+    for key in path[:-1]:
+        target = target[key]
+    target[path[-1]] = [line.strip('- ').strip() for line in items if line.strip()]
+
 def parse_goal_file(goal_path):
     """Парсит файл цели и извлекает структурированные данные."""
-    with open(goal_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    content = read_text_file(goal_path)
     
     goal_data = {
         'id': goal_path.stem,
@@ -47,83 +72,69 @@ def parse_goal_file(goal_path):
         }
     }
     
-    # Извлечение названия
-    title_match = re.search(r'^# Цель:\s*(.+)$', content, re.MULTILINE)
-    if title_match:
-        goal_data['title'] = title_match.group(1).strip()
-    
-    # Извлечение статуса
-    status_match = re.search(r'\*\*Статус:\*\*\s*(.+)$', content, re.MULTILINE)
-    if status_match:
-        goal_data['status'] = status_match.group(1).strip()
-    
-    # Извлечение идентичности
-    identity_match = re.search(r'\*\*Идентичность:\*\*\s*(.+)$', content, re.MULTILINE)
-    if identity_match:
-        goal_data['identity'] = identity_match.group(1).strip()
-    
-    # Извлечение убеждений
-    beliefs_section = re.search(r'\*\*Убеждения:\*\*\s*\n((?:- .+\n?)+)', content, re.MULTILINE)
-    if beliefs_section:
-        goal_data['beliefs'] = [
-            line.strip('- ').strip() 
-            for line in beliefs_section.group(1).strip().split('\n')
-            if line.strip()
-        ]
-    
-    # Извлечение доказательств
-    evidence_section = re.search(r'\*\*Доказательства идентичности:\*\*\s*\n((?:- .+\n?)+)', content, re.MULTILINE)
-    if evidence_section:
-        goal_data['evidence'] = [
-            line.strip('- ').strip() 
-            for line in evidence_section.group(1).strip().split('\n')
-            if line.strip()
-        ]
-    
-    # Извлечение Implementation Intentions
-    if_then_section = re.search(r'### Implementation Intentions:\s*\n((?:- .+\n?)+)', content, re.MULTILINE)
-    if if_then_section:
-        goal_data['operations']['if_then'] = [
-            line.strip('- ').strip() 
-            for line in if_then_section.group(1).strip().split('\n')
-            if line.strip()
-        ]
-    
-    # Извлечение Tiny Habits
-    tiny_habits_section = re.search(r'### Tiny Habits:\s*\n((?:- .+\n?)+)', content, re.MULTILINE)
-    if tiny_habits_section:
-        goal_data['operations']['tiny_habits'] = [
-            line.strip('- ').strip() 
-            for line in tiny_habits_section.group(1).strip().split('\n')
-            if line.strip()
-        ]
-    
-    # Извлечение метода тактики
-    method_match = re.search(r'\*\*Метод:\*\*\s*(OKR|SMART)', content, re.MULTILINE)
-    if method_match:
-        goal_data['tactics']['method'] = method_match.group(1)
+    # Один проход по строкам: секции-списки и однострочные поля.
+    # Для каждого поля учитывается первое вхождение, как раньше с re.search.
+    found = set()
+    seen_fields = set()
+    section = None
+    items = []
+    for line in content.split('\n'):
+        if section is not None:
+            if line.startswith('- ') and len(line) > 2:
+                items.append(line)
+                continue
+            if not items and not line.strip():
+                continue
+            if items:
+                _store_list_section(goal_data, section, items)
+                found.add(section)
+            section = None
+            items = []
+        
+        if not goal_data['title'] and line.startswith('# Цель:'):
+            goal_data['title'] = line[len('# Цель:'):].strip()
+            continue
+        
+        stripped = line.strip()
+        if stripped in _LIST_SECTIONS:
+            if _LIST_SECTIONS[stripped] not in found:
+                section = _LIST_SECTIONS[stripped]
+            continue
+        
+        if not stripped.startswith('**'):
+            continue
+        for prefix, key in _LINE_FIELDS.items():
+            if key not in seen_fields and stripped.startswith(prefix):
+                value = stripped[len(prefix):].strip()
+                if value:
+                    goal_data[key] = value
+                    seen_fields.add(key)
+                break
+        else:
+            if not goal_data['tactics']['method'] and stripped.startswith('**Метод:**'):
+                method = stripped[len('**Метод:**'):].lstrip()
+                if method.startswith(('OKR', 'SMART')):
+                    goal_data['tactics']['method'] = 'OKR' if method.startswith('OKR') else 'SMART'
+    
+    if section is not None and items:
+        _store_list_section(goal_data, section, items)
     
     # Извлечение Objective
-    objective_match = re.search(r'### Objective \(если OKR\):\s*\n(.+?)(?=\n###|\n\*\*|$)', content, re.DOTALL)
+    objective_match = _RE_OBJECTIVE.search(content)
     if objective_match:
         goal_data['tactics']['objective'] = objective_match.group(1).strip()
     
-    # Извлечение Key Results
-    kr_section = re.search(r'### Key Results:\s*\n((?:- .+\n?)+)', content, re.MULTILINE)
-    if kr_section:
-        goal_data['tactics']['key_results'] = [
-            line.strip('- ').strip() 
-            for line in kr_section.group(1).strip().split('\n')
-            if line.strip()
-        ]
-    
     # Извлечение SMART-цели
-    smart_section = re.search(r'### SMART-цель \(если SMART\):\s*\n(.+?)(?=\n###|\n\*\*|$)', content, re.DOTALL)
+    smart_section = _RE_SMART.search(content)
     if smart_section:
         goal_data['tactics']['smart_goal'] = smart_section.group(1).strip()
     
     return goal_data
 
+def _may_be_active(goal_path):
+    """Быстрая проверка статуса: без статуса цель считается активной, как в parse_goal_file."""
+    return read_goal_status(goal_path) in (None, 'active')
+
 def get_active_goals():
     """Получает все активные цели из директории goals/."""
     active_goals = []
@@ -131,8 +142,9 @@ def get_active_goals():
     if not GOALS_DIR.exists():
         return active_goals
     
-    for goal_file in GOALS_DIR.glob("*.md"):
-        goal_data = parse_goal_file(goal_file)
+    # Неизменённые файлы целей берутся из кэша без повторного разбора,
+    # неактивные цели отсеиваются по строке статуса без полного разбора
+    for goal_data in parse_goals_cached(GOALS_DIR.glob("*.md"), parse_goal_file, _may_be_active):
         if goal_data['status'] == 'active':
             active_goals.append(goal_data)
     
@@ -162,23 +174,23 @@ def generate_daily_reflection_template(date=None):
     reflection_file = reflection_dir / f"{date.strftime('%Y-%m-%d')}.md"
     
     # Генерируем содержимое
-    content = f"""# Ежедневная рефлексия: {date.strftime('%d.%m.%Y')}
+    parts = [f"""# Ежедневная рефлексия: {date.strftime('%d.%m.%Y')}
 
 ## Активные цели
 
-"""
+"""]
     
     for goal in active_goals:
-        content += f"- **{goal['title']}**\n"
+        parts.append(f"- **{goal['title']}**\n")
         if goal['identity']:
-            content += f"  - Идентичность: {goal['identity']}\n"
+            parts.append(f"  - Идентичность: {goal['identity']}\n")
         if goal['tactics']['objective']:
-            content += f"  - Objective: {goal['tactics']['objective']}\n"
+            parts.append(f"  - Objective: {goal['tactics']['objective']}\n")
         elif goal['tactics']['smart_goal']:
-            content += f"  - SMART-цель: {goal['tactics']['smart_goal'][:100]}...\n"
-        content += "\n"
+            parts.append(f"  - SMART-цель: {goal['tactics']['smart_goal'][:100]}...\n")
+        parts.append("\n")
     
-    content += "---\n\n## План на сегодня\n\n### Операционные действия\n\n#### Implementation Intentions:\n"
+    parts.append("---\n\n## План на сегодня\n\n### Операционные действия\n\n#### Implementation Intentions:\n")
     
     # Собираем все If-Then планы
     all_if_then = []
@@ -186,12 +198,11 @@ def generate_daily_reflection_template(date=None):
         all_if_then.extend(goal['operations']['if_then'])
     
     if all_if_then:
-        for if_then in all_if_then:
-            content += f"- [ ] {if_then}\n"
+        parts.extend(f"- [ ] {if_then}\n" for if_then in all_if_then)
     else:
-        content += "- [ ] (нет активных If-Then планов)\n"
+        parts.append("- [ ] (нет активных If-Then планов)\n")
     
-    content += "\n#### Tiny Habits:\n"
+    parts.append("\n#### Tiny Habits:\n")
     
     # Собираем все Tiny Habits
     all_tiny_habits = []
@@ -199,26 +210,25 @@ def generate_daily_reflection_template(date=None):
         all_tiny_habits.extend(goal['operations']['tiny_habits'])
     
     if all_tiny_habits:
-        for habit in all_tiny_habits:
-            content += f"- [ ] {habit}\n"
+        parts.extend(f"- [ ] {habit}\n" for habit in all_tiny_habits)
     else:
-        content += "- [ ] (нет активных Tiny Habits)\n"
+        parts.append("- [ ] (нет активных Tiny Habits)\n")
     
-    content += "\n### Тактические задачи\n\n"
+    parts.append("\n### Тактические задачи\n\n")
     
     # Собираем задачи из Key Results
     for goal in active_goals:
         if goal['tactics']['key_results']:
-            content += f"**{goal['title']}:**\n"
+            parts.append(f"**{goal['title']}:**\n")
             for kr in goal['tactics']['key_results']:
                 # Извлекаем только описание KR без метрик
                 kr_desc = kr.split('|')[0].strip() if '|' in kr else kr.strip()
-                content += f"- [ ] {kr_desc}\n"
-            content += "\n"
+                parts.append(f"- [ ] {kr_desc}\n")
+            parts.append("\n")
     
-    content += "---\n\n## Выполнение\n\n### Что сделано\n\n#### Операции:\n"
-    content += "- [ ] \n\n#### Тактика:\n"
-    content += "- [ ] \n\n### Доказательства идентичности\n\n"
+    parts.append("---\n\n## Выполнение\n\n### Что сделано\n\n#### Операции:\n")
+    parts.append("- [ ] \n\n#### Тактика:\n")
+    parts.append("- [ ] \n\n### Доказательства идентичности\n\n")
     
     # Собираем все доказательства
     all_evidence = []
@@ -226,34 +236,32 @@ def generate_daily_reflection_template(date=None):
         all_evidence.extend(goal['evidence'])
     
     if all_evidence:
-        for evidence in all_evidence:
-            content += f"- [ ] {evidence}\n"
+        parts.extend(f"- [ ] {evidence}\n" for evidence in all_evidence)
     else:
-        content += "- [ ] (нет активных доказательств для отслеживания)\n"
-    
-    content += "\n### Препятствия и решения\n\n**Что помешало:**\n"
-    content += "- \n\n**Что помогло:**\n"
-    content += "- \n\n---\n\n## Оценка дня\n\n"
-    content += "**Общая оценка:** [1-10]\n\n"
-    content += "**Выполнение операций:** [%]\n"
-    content += "**Выполнение тактики:** [%]\n\n"
-    content += "**Энергия:** [высокая | средняя | низкая]\n"
-    content += "**Мотивация:** [высокая | средняя | низкая]\n"
-    content += "**Фокус:** [высокий | средний | низкий]\n\n"
-    content += "---\n\n## Инсайты и наблюдения\n\n"
-    content += "[Свободные заметки о дне, что узнал, что изменилось]\n\n"
-    content += "---\n\n## План на завтра\n\n"
-    content += "[Ключевые действия на следующий день]\n\n"
-    content += "---\n\n## Комментарии ИИ-системы\n\n"
-    content += "*[Автоматически генерируется после анализа заполненной рефлексии]*\n\n"
-    content += "### Анализ прогресса:\n"
-    content += "- \n\n### Рекомендации:\n"
-    content += "- \n\n### Адаптации:\n"
-    content += "- \n"
-    
-    # Сохраняем файл
-    with open(reflection_file, 'w', encoding='utf-8') as f:
-        f.write(content)
+        parts.append("- [ ] (нет активных доказательств для отслеживания)\n")
+    
+    parts.append("\n### Препятствия и решения\n\n**Что помешало:**\n")
+    parts.append("- \n\n**Что помогло:**\n")
+    parts.append("- \n\n---\n\n## Оценка дня\n\n")
+    parts.append("**Общая оценка:** [1-10]\n\n")
+    parts.append("**Выполнение операций:** [%]\n")
+    parts.append("**Выполнение тактики:** [%]\n\n")
+    parts.append("**Энергия:** [высокая | средняя | низкая]\n")
+    parts.append("**Мотивация:** [высокая | средняя | низкая]\n")
+    parts.append("**Фокус:** [высокий | средний | низкий]\n\n")
+    parts.append("---\n\n## Инсайты и наблюдения\n\n")
+    parts.append("[Свободные заметки о дне, что узнал, что изменилось]\n\n")
+    parts.append("---\n\n## План на завтра\n\n")
+    parts.append("[Ключевые действия на следующий день]\n\n")
+    parts.append("---\n\n## Комментарии ИИ-системы\n\n")
+    parts.append("*[Автоматически генерируется после анализа заполненной рефлексии]*\n\n")
+    parts.append("### Анализ прогресса:\n")
+    parts.append("- \n\n### Рекомендации:\n")
+    parts.append("- \n\n### Адаптации:\n")
+    parts.append("- \n")
+    
+    # Сохраняем файл целиком: при ошибке во время генерации старый файл не портится
+    write_text_file(reflection_file, "".join(parts))
     
     print(f"✅ Шаблон рефлексии создан: {reflection_file}")
     return reflection_file
@@ -15,23 +15,24 @@
 
 import json
 import sys
-import statistics
 from pathlib import Path
+from types import MappingProxyType
 import sys
 
 # Добавить system/scripts в sys.path для импорта config_loader
 SCRIPT_DIR = Path(__file__).parent
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from config_loader import get_project_root, get_path
+from config_loader import get_project_root, get_path, load_json_cache, save_json_cache, write_text_file
 from datetime import datetime, timedelta
 import argparse
 from string import Template
 from collections import defaultdict
+from functools import lru_cache
 
 # Импорт функций
 sys.path.append(str(Path(__file__).parent))
-from analyze_reflection import parse_reflection_file
+from analyze_reflection import list_reflection_files, try_parse_reflection_file
 
 # Пути
 PROJECT_ROOT = get_project_root()
@@ -39,176 +40,33 @@ REFLECTIONS_DIR = get_path("reflections")
 DAILY_DIR = REFLECTIONS_DIR / "daily"
 DASHBOARDS_DIR = get_path("dashboards") / "weekly"
 
-
-def get_week_dates(year, week_number):
-    """Получить даты начала и конца недели."""
-    # Первый день года
-    jan_1 = datetime(year, 1, 1)
-    # Найти первый понедельник
-    days_to_monday = (7 - jan_1.weekday()) % 7
-    first_monday = jan_1 + timedelta(days=days_to_monday)
-
-    # Начало нужной недели
-    week_start = first_monday + timedelta(weeks=week_number - 1)
-    week_end = week_start + timedelta(days=6)
-
-    return week_start, week_end
-
-
-def get_reflection_path(date):
-    """Получить путь к рефлексии."""
-    year = date.strftime("%Y")
-    month = date.strftime("%m")
-    filename = date.strftime("%Y-%m-%d")
-    return DAILY_DIR / year / month / f"{filename}.md"
-
-
-def collect_week_data(week_start, week_end):
-    """Собрать данные за неделю."""
-    week_data = []
-    current_date = week_start
-
-    while current_date <= week_end:
-        reflection_path = get_reflection_path(current_date)
-
-        if reflection_path.exists():
-            try:
-                data = parse_reflection_file(reflection_path)
-
-                # Вычислить метрики
-                operations_percent = data.get('operations_percent', 0)
-                if operations_percent == 0:
-                    operations_done = len(data.get('operations_done', []))
-                    operations_percent = min(100, int((operations_done / 8) * 100))
-
-                tactics_percent = data.get('tactics_percent', 0)
-                evidence_count = len(data.get('evidence_done', []))
-
-                week_data.append({
-                    'date': current_date,
-                    'day_name': current_date.strftime('%A'),
-                    'operations_percent': operations_percent,
-                    'tactics_percent': tactics_percent,
-                    'evidence_count': evidence_count,
-                    'rating': data.get('rating', 0)
-                })
-            except:
-                week_data.append({
-                    'date': current_date,
-                    'day_name': current_date.strftime('%A'),
-                    'operations_percent': 0,
-                    'tactics_percent': 0,
-                    'evidence_count': 0,
-                    'rating': 0
-                })
-
-        current_date += timedelta(days=1)
-
-    return week_data
-
-
-def calculate_week_stats(week_data):
-    """Вычислить статистику за неделю."""
-    if not week_data:
-        return {}
-
-    operations_values = [d['operations_percent'] for d in week_data if d['operations_percent'] > 0]
-    tactics_values = [d['tactics_percent'] for d in week_data if d['tactics_percent'] > 0]
-    evidence_values = [d['evidence_count'] for d in week_data]
-
-    return {
-        'avg_operations': round(statistics.mean(operations_values), 1) if operations_values else 0,
-        'avg_tactics': round(statistics.mean(tactics_values), 1) if tactics_values else 0,
-        'avg_evidence_per_day': round(statistics.mean(evidence_values), 1) if evidence_values else 0,
-        'total_evidence': sum(evidence_values),
-        'days_tracked': len(week_data),
-        'best_day': max(week_data, key=lambda d: d['operations_percent']) if week_data else None,
-        'worst_day': min(week_data, key=lambda d: d['operations_percent']) if week_data else None
-    }
-
-
-def compare_weeks(current_stats, previous_stats):
-    """Сравнить текущую и предыдущую неделю."""
-    if not previous_stats:
-        return {}
-
-    return {
-        'operations_change': round(current_stats['avg_operations'] - previous_stats['avg_operations'], 1),
-        'tactics_change': round(current_stats['avg_tactics'] - previous_stats['avg_tactics'], 1),
-        'evidence_change': round(current_stats['avg_evidence_per_day'] - previous_stats['avg_evidence_per_day'], 1)
-    }
-
-
-def generate_insights(week_data, current_stats, comparison):
-    """Генерировать инсайты и рекомендации."""
-    insights = []
-    recommendations = []
-
-    # Анализ выполнения операций
-    if current_stats['avg_operations'] >= 80:
-        insights.append("Отличное выполнение операций - вы на правильном пути!")
-    elif current_stats['avg_operations'] < 60:
-        recommendations.append("Упростите операционные действия или уменьшите их количество")
-
-    # Сравнение с предыдущей неделей
-    if comparison.get('operations_change', 0) > 5:
-        insights.append(f"Прогресс! Выполнение операций выросло на {comparison['operations_change']}%")
-    elif comparison.get('operations_change', 0) < -5:
-        recommendations.append("Выполнение снизилось. Проанализируйте что изменилось")
-
-    # Анализ по дням недели
-    day_stats = defaultdict(list)
-    for day_data in week_data:
-        day_stats[day_data['day_name']].append(day_data['operations_percent'])
-
-    weak_days = [day for day, values in day_stats.items() if statistics.mean(values) < 60]
-    if weak_days:
-        recommendations.append(f"Слабые дни: {', '.join(weak_days)}. Упростите план на эти дни")
-
-    # Лучший и худший день
-    if current_stats['best_day']:
-        best = current_stats['best_day']
-        insights.append(f"Лучший день: {best['date'].strftime('%A')} ({best['operations_percent']}%)")
-
-    if current_stats['worst_day']:
-        worst = current_stats['worst_day']
-        if worst['operations_percent'] < 50:
-            recommendations.append(f"Худший день: {worst['date'].strftime('%A')} ({worst['operations_percent']}%). Пересмотрите план")
-
-    return insights, recommendations
-
-
-def generate_html_dashboard(week_number, year, week_data, current_stats, previous_stats, comparison):
-    """Генерировать HTML дашборд."""
-
-    week_start = week_data[0]['date'] if week_data else datetime.now()
-    week_end = week_data[-1]['date'] if week_data else datetime.now()
-
-    # Инсайты и рекомендации
-    insights, recommendations = generate_insights(week_data, current_stats, comparison)
-
-    # Таблица сравнения
-    ops_change = comparison.get('operations_change', 0)
-    tactics_change = comparison.get('tactics_change', 0)
-    evidence_change = comparison.get('evidence_change', 0)
-
-    ops_arrow = "↑" if ops_change > 0 else "↓" if ops_change < 0 else "→"
-    tactics_arrow = "↑" if tactics_change > 0 else "↓" if tactics_change < 0 else "→"
-    evidence_arrow = "↑" if evidence_change > 0 else "↓" if evidence_change < 0 else "→"
-
-    prev_ops = previous_stats.get('avg_operations', 0) if previous_stats else 0
-    prev_tactics = previous_stats.get('avg_tactics', 0) if previous_stats else 0
-    prev_evidence = previous_stats.get('avg_evidence_per_day', 0) if previous_stats else 0
-
-    # График по дням недели
-    day_chart_bars = ""
-    for day_data in week_data:
-        day_name_short = day_data['date'].strftime('%a')
-        ops_percent = day_data['operations_percent']
-        bar_width = ops_percent
-        color = '#34c759' if ops_percent >= 80 else '#ffcc00' if ops_percent >= 60 else '#ff3b30'
-
-        day_chart_bars += f'''
+# Кэш показателей дней недели: рефлексия разбирается заново, только если у файла
+# изменились mtime или размер
+WEEK_CACHE_FILE = PROJECT_ROOT / ".cache" / "weekly.json"
+WEEK_CACHE_VERSION = 1
+
+# Названия дней недели по date.weekday(), как strftime('%A') и strftime('%a')
+# в локали C (скрипты не меняют локаль)
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+DAY_NAMES_SHORT = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+# Показатели дня, рефлексию которого не удалось разобрать
+EMPTY_DAY_METRICS = MappingProxyType({
+    'operations_percent': 0,
+    'tactics_percent': 0,
+    'evidence_count': 0,
+    'rating': 0
+})
+
+# Шаг по дням недели
+ONE_DAY = timedelta(days=1)
+
+# Стрелки и CSS классы изменений: снижение, без изменений, рост
+CHANGE_ARROWS = ('↓', '→', '↑')
+CHANGE_CLASSES = ('change-negative', 'change-neutral', 'change-positive')
+
+# Полоса дня на графике выполнения операций
+DAY_BAR_TEMPLATE = '''
         <div style="margin-bottom: 10px;">
             <div style="display: flex; align-items: center;">
                 <span style="width: 50px; font-size: 13px; color: #666;">{day_name_short}:</span>
@@ -221,36 +79,8 @@ def generate_html_dashboard(week_number, year, week_data, current_stats, previou
         </div>
         '''
 
-    # Топ достижения
-    achievements = []
-    if current_stats['avg_operations'] >= 80:
-        achievements.append("🎉 Отличный процент выполнения операций!")
-    if current_stats['total_evidence'] >= 10:
-        achievements.append(f"📈 Накоплено {current_stats['total_evidence']} доказательств идентичности")
-    if ops_change > 10:
-        achievements.append(f"💪 Прогресс вырос на {ops_change}%")
-
-    achievements_html = ""
-    for i, achievement in enumerate(achievements[:3], 1):
-        achievements_html += f"<li>{achievement}</li>\n"
-
-    if not achievements_html:
-        achievements_html = "<li>Продолжайте работать над своими целями!</li>"
-
-    # Рекомендации
-    recommendations_html = ""
-    for recommendation in recommendations[:3]:
-        recommendations_html += f"<li>{recommendation}</li>\n"
-
-    if not recommendations_html:
-        recommendations_html = "<li>План работает хорошо, значительных изменений не требуется</li>"
-
-    # Инсайты
-    insights_html = ""
-    for insight in insights[:3]:
-        insights_html += f"<li>{insight}</li>\n"
-
-    html_template = Template('''<!DOCTYPE html>
+# Шаблон HTML дашборда собирается один раз при импорте
+_WEEKLY_HTML_TEMPLATE = Template('''<!DOCTYPE html>
 <html lang="ru">
 <head>
     <meta charset="UTF-8">
@@ -406,12 +236,265 @@ def generate_html_dashboard(week_number, year, week_data, current_stats, previou
 </body>
 </html>''')
 
-    # Классы для изменений
-    ops_change_class = "change-positive" if ops_change > 0 else "change-negative" if ops_change < 0 else "change-neutral"
-    tactics_change_class = "change-positive" if tactics_change > 0 else "change-negative" if tactics_change < 0 else "change-neutral"
-    evidence_change_class = "change-positive" if evidence_change > 0 else "change-negative" if evidence_change < 0 else "change-neutral"
 
-    html = html_template.substitute(
+def get_week_dates(year, week_number):
+    """Получить даты начала и конца недели."""
+    # Первый день года
+    jan_1 = datetime(year, 1, 1)
+    # Найти первый понедельник
+    days_to_monday = (7 - jan_1.weekday()) % 7
+    first_monday = jan_1 + timedelta(days=days_to_monday)
+
+    # Начало нужной недели
+    week_start = first_monday + timedelta(weeks=week_number - 1)
+    week_end = week_start + timedelta(days=6)
+
+    return week_start, week_end
+
+
+@lru_cache(maxsize=32)
+def get_month_dir(year, month):
+    """Получить директорию рефлексий за месяц (одна на все дни месяца)."""
+    return DAILY_DIR / f"{year:04d}" / f"{month:02d}"
+
+
+def get_reflection_path(date):
+    """Получить путь к рефлексии."""
+    # Форматирование чисел вместо strftime: путь строится для каждого дня недели
+    return get_month_dir(date.year, date.month) / f"{date.year:04d}-{date.month:02d}-{date.day:02d}.md"
+
+
+def collect_week_data(week_start, week_end, cache, entries):
+    """
+    Собрать данные за неделю.
+
+    cache — загруженный кэш показателей дней; в entries добавляются записи
+    о днях этой недели, из них вызывающий собирает новый кэш.
+    """
+    week_data = []
+    dates = [week_start + i * ONE_DAY for i in range((week_end - week_start).days + 1)]
+
+    # Один листинг на месяц (неделя затрагивает не больше двух)
+    # вместо проверки exists() для каждого дня
+    existing = list_reflection_files(dates)
+
+    # Показатели неизменённых рефлексий берутся из кэша, остальные разбираются
+    days = []
+
+    for current_date in dates:
+        reflection_path = get_reflection_path(current_date)
+
+        if reflection_path.name in existing:
+            try:
+                stat = reflection_path.stat()
+            except OSError:
+                # Файл удалён после листинга — день без рефлексии
+                continue
+            entry = cache.get(str(reflection_path))
+            if not entry or entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                entry = None
+            days.append((current_date, reflection_path, stat, entry))
+
+    for current_date, reflection_path, stat, entry in days:
+        if entry is None:
+            data = try_parse_reflection_file(reflection_path)
+
+            if data is None:
+                entry = EMPTY_DAY_METRICS
+            else:
+                # Вычислить метрики
+                operations_percent = data.get('operations_percent', 0)
+                if operations_percent == 0:
+                    operations_done = len(data.get('operations_done', []))
+                    operations_percent = min(100, int((operations_done / 8) * 100))
+
+                entry = {
+                    'mtime_ns': stat.st_mtime_ns,
+                    'size': stat.st_size,
+                    'operations_percent': operations_percent,
+                    'tactics_percent': data.get('tactics_percent', 0),
+                    'evidence_count': len(data.get('evidence_done', [])),
+                    'rating': data.get('rating', 0)
+                }
+                entries[str(reflection_path)] = entry
+        else:
+            entries[str(reflection_path)] = entry
+
+        week_data.append({
+            'date': current_date,
+            'day_name': DAY_NAMES[current_date.weekday()],
+            'operations_percent': entry['operations_percent'],
+            'tactics_percent': entry['tactics_percent'],
+            'evidence_count': entry['evidence_count'],
+            'rating': entry['rating']
+        })
+
+    return week_data
+
+
+def average(total, count):
+    """Среднее целых чисел, как statistics.mean: целое, если делится нацело, иначе float."""
+    quotient, remainder = divmod(total, count)
+    return total / count if remainder else quotient
+
+
+def calculate_week_stats(week_data):
+    """Вычислить статистику за неделю."""
+    if not week_data:
+        return {}
+
+    # Один проход: суммы для средних и лучший/худший день.
+    # Нулевые операции и тактика не учитываются в средних.
+    operations_sum = operations_count = 0
+    tactics_sum = tactics_count = 0
+    total_evidence = 0
+    best_day = worst_day = week_data[0]
+
+    for day_data in week_data:
+        operations_percent = day_data['operations_percent']
+        if operations_percent > 0:
+            operations_sum += operations_percent
+            operations_count += 1
+        if day_data['tactics_percent'] > 0:
+            tactics_sum += day_data['tactics_percent']
+            tactics_count += 1
+        total_evidence += day_data['evidence_count']
+
+        # Строгое сравнение: при равенстве остается первый день, как у max/min
+        if operations_percent > best_day['operations_percent']:
+            best_day = day_data
+        if operations_percent < worst_day['operations_percent']:
+            worst_day = day_data
+
+    return {
+        'avg_operations': round(average(operations_sum, operations_count), 1) if operations_count else 0,
+        'avg_tactics': round(average(tactics_sum, tactics_count), 1) if tactics_count else 0,
+        'avg_evidence_per_day': round(average(total_evidence, len(week_data)), 1),
+        'total_evidence': total_evidence,
+        'days_tracked': len(week_data),
+        'best_day': best_day,
+        'worst_day': worst_day
+    }
+
+
+def compare_weeks(current_stats, previous_stats):
+    """Сравнить текущую и предыдущую неделю."""
+    if not previous_stats:
+        return {}
+
+    return {
+        'operations_change': round(current_stats['avg_operations'] - previous_stats['avg_operations'], 1),
+        'tactics_change': round(current_stats['avg_tactics'] - previous_stats['avg_tactics'], 1),
+        'evidence_change': round(current_stats['avg_evidence_per_day'] - previous_stats['avg_evidence_per_day'], 1)
+    }
+
+
+def generate_insights(week_data, current_stats, comparison):
+    """Генерировать инсайты и рекомендации."""
+    insights = []
+    recommendations = []
+
+    # Анализ выполнения операций
+    if current_stats['avg_operations'] >= 80:
+        insights.append("Отличное выполнение операций - вы на правильном пути!")
+    elif current_stats['avg_operations'] < 60:
+        recommendations.append("Упростите операционные действия или уменьшите их количество")
+
+    # Сравнение с предыдущей неделей
+    if comparison.get('operations_change', 0) > 5:
+        insights.append(f"Прогресс! Выполнение операций выросло на {comparison['operations_change']}%")
+    elif comparison.get('operations_change', 0) < -5:
+        recommendations.append("Выполнение снизилось. Проанализируйте что изменилось")
+
+    # Анализ по дням недели
+    day_stats = defaultdict(list)
+    for day_data in week_data:
+        day_stats[day_data['day_name']].append(day_data['operations_percent'])
+
+    weak_days = [day for day, values in day_stats.items() if average(sum(values), len(values)) < 60]
+    if weak_days:
+        recommendations.append(f"Слабые дни: {', '.join(weak_days)}. Упростите план на эти дни")
+
+    # Лучший и худший день
+    if current_stats['best_day']:
+        best = current_stats['best_day']
+        insights.append(f"Лучший день: {best['day_name']} ({best['operations_percent']}%)")
+
+    if current_stats['worst_day']:
+        worst = current_stats['worst_day']
+        if worst['operations_percent'] < 50:
+            recommendations.append(f"Худший день: {worst['day_name']} ({worst['operations_percent']}%). Пересмотрите план")
+
+    return insights, recommendations
+
+
+def get_change_style(change):
+    """Получить стрелку и CSS класс для изменения показателя."""
+    # Индекс по знаку изменения: -1 -> 0, 0 -> 1, +1 -> 2
+    index = (change > 0) - (change < 0) + 1
+    return CHANGE_ARROWS[index], CHANGE_CLASSES[index]
+
+
+def generate_html_dashboard(week_number, year, week_data, current_stats, previous_stats, comparison,
+                            insights, recommendations):
+    """Генерировать HTML дашборд."""
+
+    week_start = week_data[0]['date'] if week_data else datetime.now()
+    week_end = week_data[-1]['date'] if week_data else datetime.now()
+
+    # Таблица сравнения
+    ops_change = comparison.get('operations_change', 0)
+    tactics_change = comparison.get('tactics_change', 0)
+    evidence_change = comparison.get('evidence_change', 0)
+
+    ops_arrow, ops_change_class = get_change_style(ops_change)
+    tactics_arrow, tactics_change_class = get_change_style(tactics_change)
+    evidence_arrow, evidence_change_class = get_change_style(evidence_change)
+
+    prev_ops = previous_stats.get('avg_operations', 0) if previous_stats else 0
+    prev_tactics = previous_stats.get('avg_tactics', 0) if previous_stats else 0
+    prev_evidence = previous_stats.get('avg_evidence_per_day', 0) if previous_stats else 0
+
+    # График по дням недели
+    day_chart_parts = []
+    for day_data in week_data:
+        day_name_short = DAY_NAMES_SHORT[day_data['date'].weekday()]
+        ops_percent = day_data['operations_percent']
+        bar_width = ops_percent
+        color = '#34c759' if ops_percent >= 80 else '#ffcc00' if ops_percent >= 60 else '#ff3b30'
+
+        day_chart_parts.append(DAY_BAR_TEMPLATE.format(
+            day_name_short=day_name_short,
+            bar_width=bar_width,
+            color=color,
+            ops_percent=ops_percent
+        ))
+    day_chart_bars = ''.join(day_chart_parts)
+
+    # Топ достижения
+    achievements = []
+    if current_stats['avg_operations'] >= 80:
+        achievements.append("🎉 Отличный процент выполнения операций!")
+    if current_stats['total_evidence'] >= 10:
+        achievements.append(f"📈 Накоплено {current_stats['total_evidence']} доказательств идентичности")
+    if ops_change > 10:
+        achievements.append(f"💪 Прогресс вырос на {ops_change}%")
+
+    achievements_html = ''.join(f"<li>{achievement}</li>\n" for achievement in achievements[:3])
+
+    if not achievements_html:
+        achievements_html = "<li>Продолжайте работать над своими целями!</li>"
+
+    # Рекомендации
+    recommendations_html = ''.join(f"<li>{recommendation}</li>\n" for recommendation in recommendations[:3])
+
+    if not recommendations_html:
+        recommendations_html = "<li>План работает хорошо, значительных изменений не требуется</li>"
+
+    # Инсайты
+    insights_html = ''.join(f"<li>{insight}</li>\n" for insight in insights[:3])
+
+    html = _WEEKLY_HTML_TEMPLATE.substitute(
         week_number=week_number,
         year=year,
         week_start=week_start.strftime('%d.%m.%Y'),
@@ -440,7 +523,8 @@ def generate_html_dashboard(week_number, year, week_data, current_stats, previou
     return html
 
 
-def generate_markdown_dashboard(week_number, year, week_data, current_stats, previous_stats, comparison):
+def generate_markdown_dashboard(week_number, year, week_data, current_stats, previous_stats, comparison,
+                                insights, recommendations):
     """Генерировать markdown дашборд."""
 
     week_start = week_data[0]['date'] if week_data else datetime.now()
@@ -454,28 +538,25 @@ def generate_markdown_dashboard(week_number, year, week_data, current_stats, pre
     md += "|------------|------------|----------------|----------|\n"
 
     ops_change = comparison.get('operations_change', 0)
-    ops_arrow = "↑" if ops_change > 0 else "↓" if ops_change < 0 else "→"
+    ops_arrow = get_change_style(ops_change)[0]
     md += f"| Операции | {current_stats['avg_operations']}% | {previous_stats.get('avg_operations', 0)}% | {ops_arrow} {abs(ops_change)}% |\n"
 
     tactics_change = comparison.get('tactics_change', 0)
-    tactics_arrow = "↑" if tactics_change > 0 else "↓" if tactics_change < 0 else "→"
+    tactics_arrow = get_change_style(tactics_change)[0]
     md += f"| Тактика | {current_stats['avg_tactics']}% | {previous_stats.get('avg_tactics', 0)}% | {tactics_arrow} {abs(tactics_change)}% |\n"
 
     evidence_change = comparison.get('evidence_change', 0)
-    evidence_arrow = "↑" if evidence_change > 0 else "↓" if evidence_change < 0 else "→"
+    evidence_arrow = get_change_style(evidence_change)[0]
     md += f"| Доказательства/день | {current_stats['avg_evidence_per_day']} | {previous_stats.get('avg_evidence_per_day', 0)} | {evidence_arrow} {abs(evidence_change)} |\n\n"
 
     md += "## График выполнения\n\n"
     md += "```\n"
     for day_data in week_data:
-        day_short = day_data['date'].strftime('%a')
+        day_short = DAY_NAMES_SHORT[day_data['date'].weekday()]
         ops_bar = '█' * int(day_data['operations_percent'] / 10)
         md += f"{day_short}: {ops_bar:<10} {day_data['operations_percent']}%\n"
     md += "```\n\n"
 
-    # Инсайты и рекомендации
-    insights, recommendations = generate_insights(week_data, current_stats, comparison)
-
     md += "## Инсайты\n\n"
     for insight in insights:
         md += f"- {insight}\n"
@@ -509,8 +590,13 @@ def main():
     # Получить даты недели
     week_start, week_end = get_week_dates(year, week_number)
 
+    # Кэш собирается заново только из дней текущей и предыдущей недели,
+    # чтобы не расти без границ
+    week_cache = load_json_cache(WEEK_CACHE_FILE, WEEK_CACHE_VERSION)
+    week_cache_entries = {}
+
     # Собрать данные за текущую неделю
-    week_data = collect_week_data(week_start, week_end)
+    week_data = collect_week_data(week_start, week_end, week_cache, week_cache_entries)
 
     if not week_data:
         print("❌ Нет данных за эту неделю")
@@ -522,34 +608,46 @@ def main():
     # Собрать данные за предыдущую неделю
     prev_week_start = week_start - timedelta(weeks=1)
     prev_week_end = week_end - timedelta(weeks=1)
-    prev_week_data = collect_week_data(prev_week_start, prev_week_end)
+    prev_week_data = collect_week_data(prev_week_start, prev_week_end, week_cache, week_cache_entries)
+
+    if week_cache_entries != week_cache:
+        save_json_cache(WEEK_CACHE_FILE, WEEK_CACHE_VERSION, week_cache_entries)
     previous_stats = calculate_week_stats(prev_week_data)
 
     # Сравнить
     comparison = compare_weeks(current_stats, previous_stats)
 
+    # Инсайты и рекомендации (общие для HTML и markdown)
+    insights, recommendations = generate_insights(week_data, current_stats, comparison)
+
     # Генерировать HTML
-    html = generate_html_dashboard(week_number, year, week_data, current_stats, previous_stats, comparison)
+    html = generate_html_dashboard(week_number, year, week_data, current_stats, previous_stats, comparison,
+                                   insights, recommendations)
 
     # Сохранить HTML
     DASHBOARDS_DIR.mkdir(parents=True, exist_ok=True)
     html_path = DASHBOARDS_DIR / f"week_{week_number:02d}_{year}.html"
-
-    with open(html_path, 'w', encoding='utf-8') as f:
-        f.write(html)
+    write_text_file(html_path, html)
 
     print(f"✅ HTML дашборд: {html_path}")
 
     # Генерировать markdown
-    markdown = generate_markdown_dashboard(week_number, year, week_data, current_stats, previous_stats, comparison)
+    markdown = generate_markdown_dashboard(week_number, year, week_data, current_stats, previous_stats, comparison,
+                                           insights, recommendations)
 
     # Сохранить markdown
     md_path = DASHBOARDS_DIR / f"week_{week_number:02d}_{year}.md"
-
-    with open(md_path, 'w', encoding='utf-8') as f:
-        f.write(markdown)
+    write_text_file(md_path, markdown)
 
     print(f"✅ Markdown дашборд: {md_path}")
+
+    # Сохранить средние показатели для notification_system, чтобы не разбирать markdown
+    metrics_path = DASHBOARDS_DIR / f"week_{week_number:02d}_{year}.metrics.json"
+    write_text_file(metrics_path, json.dumps({
+        'avg_operations': current_stats['avg_operations'],
+        'avg_tactics': current_stats['avg_tactics']
+    }))
+
     print("\n🎉 Недельный дашборд создан успешно!")
 
 
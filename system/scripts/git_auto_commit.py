@@ -20,20 +20,20 @@ import sys
 SCRIPT_DIR = Path(__file__).parent
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from config_loader import get_project_root, get_path
+from config_loader import get_project_root, get_path, load_config as load_config_file
 from datetime import datetime
-import yaml
 
 # Пути
 PROJECT_ROOT = get_project_root()
-CONFIG_FILE = PROJECT_ROOT / "config"  # config всегда в корне / "git_auto_commit.yaml"
 
 
 def load_config():
     """Загрузить конфигурацию."""
-    if CONFIG_FILE.exists():
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+    # config/git_auto_commit.yaml (или .yaml.example) разбирается общим загрузчиком:
+    # CSafeLoader при наличии libyaml
+    config = load_config_file('git_auto_commit')
+    if config is not None:
+        return config
     else:
         # Конфигурация по умолчанию
         return {
@@ -52,60 +52,78 @@ def load_config():
         }
 
 
-def run_git_command(command):
-    """Запустить git команду."""
+def run_git_command(command, input_text=None, text=True):
+    """
+    Запустить git команду (input_text передается на stdin).
+
+    При text=False ввод и вывод — байты, вывод возвращается без обрезки.
+    """
     try:
         result = subprocess.run(
             command,
             cwd=PROJECT_ROOT,
+            input=input_text,
             capture_output=True,
-            text=True,
+            text=text,
             check=True
         )
-        return result.stdout.strip()
+        return result.stdout.strip() if text else result.stdout
     except subprocess.CalledProcessError as e:
-        print(f"❌ Ошибка git команды: {e.stderr}", file=sys.stderr)
+        stderr = e.stderr if text else e.stderr.decode('utf-8', errors='replace')
+        print(f"❌ Ошибка git команды: {stderr}", file=sys.stderr)
         return None
 
 
 def get_changed_files():
     """Получить список измененных файлов."""
-    output = run_git_command(['git', 'status', '--porcelain'])
+    # -z: записи разделены NUL, пути не экранируются и не берутся в кавычки
+    output = run_git_command(['git', 'status', '--porcelain=v1', '-z'], text=False)
     if not output:
         return []
 
     files = []
-    for line in output.split('\n'):
-        if line.strip():
-            # Формат: "M  file.txt" или "?? file.txt"
-            parts = line.strip().split(maxsplit=1)
-            if len(parts) == 2:
-                files.append(parts[1])
+    records = iter(output.split(b'\0'))
+    for record in records:
+        if not record:
+            continue
+        # Формат: "XY путь", например "M  file.txt" или "?? file.txt"
+        status = record[:2]
+        files.append(record[3:].decode('utf-8', errors='surrogateescape'))
+        if b'R' in status or b'C' in status:
+            # Для переименования/копирования следом идет исходный путь
+            next(records, None)
 
     return files
 
 
 def filter_files(files, include_patterns):
     """Фильтровать файлы по паттернам."""
-    filtered = []
-    for file in files:
-        for pattern in include_patterns:
-            if file.startswith(pattern):
-                filtered.append(file)
-                break
-    return filtered
+    # str.startswith проверяет весь кортеж префиксов за один вызов
+    patterns = tuple(include_patterns)
+    return [file for file in files if file.startswith(patterns)]
 
 
 def determine_commit_type(files):
     """Определить тип коммита по файлам."""
     today = datetime.now()
 
-    # Проверить какие файлы изменены
-    has_reflection = any('reflections/daily/' in f for f in files)
-    has_dashboard_daily = any('dashboards/daily/' in f for f in files)
-    has_dashboard_weekly = any('dashboards/weekly/' in f for f in files)
-    has_goals = any('goals/' in f for f in files)
-    has_validation = any('dashboards/validation/' in f for f in files)
+    # Проверить какие файлы изменены: один проход по списку
+    has_reflection = has_dashboard_daily = has_dashboard_weekly = False
+    has_goals = has_validation = False
+    for f in files:
+        if 'reflections/daily/' in f:
+            has_reflection = True
+        if 'dashboards/daily/' in f:
+            has_dashboard_daily = True
+        if 'dashboards/weekly/' in f:
+            has_dashboard_weekly = True
+        if 'goals/' in f:
+            has_goals = True
+        if 'dashboards/validation/' in f:
+            has_validation = True
+        if (has_reflection and has_dashboard_daily and has_dashboard_weekly
+                and has_goals and has_validation):
+            break
 
     # Определить приоритет
     if has_dashboard_weekly:
@@ -186,13 +204,17 @@ def main():
     commit_message = create_commit_message(commit_type, params, templates)
     print(f"Сообщение: {commit_message}\n")
 
-    # Добавить файлы
+    # Добавить файлы одним вызовом git: пути передаются через stdin,
+    # поэтому длина списка не упирается в лимит командной строки
     print("Добавление файлов в staged...")
-    for file in filtered_files:
-        result = run_git_command(['git', 'add', file])
-        if result is None:
-            print(f"❌ Не удалось добавить {file}")
-            return
+    result = run_git_command(
+        ['git', 'add', '--pathspec-from-file=-', '--pathspec-file-nul'],
+        input_text='\0'.join(filtered_files).encode('utf-8', errors='surrogateescape'),
+        text=False
+    )
+    if result is None:
+        print("❌ Не удалось добавить файлы в staged")
+        return
 
     # Создать коммит
     print("Создание коммита...")
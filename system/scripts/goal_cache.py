@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Быстрый доступ к файлам целей для plan_expo.
+
+Обеспечивает:
+- Кэш разобранных целей: результат parse_goal_file сохраняется
+  в .cache/goals.json и используется повторно, пока у файла цели
+  не изменились mtime и размер
+- Чтение статуса цели без полного чтения и разбора файла
+
+Использование:
+    from goal_cache import parse_goals_cached, read_goal_status
+
+    goals = parse_goals_cached(GOALS_DIR.glob("*.md"), parse_goal_file)
+    is_active = read_goal_status(goal_path) == 'active'
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config_loader import get_project_root, load_json_cache, save_json_cache
+
+CACHE_FILE = get_project_root() / ".cache" / "goals.json"
+
+# Увеличивать при изменении формата goal_data, чтобы сбросить старый кэш
+# (2: отклонённые prefilter файлы больше не хранятся как data: None)
+CACHE_VERSION = 2
+
+STATUS_MARKER = '**Статус:**'.encode('utf-8')
+
+
+def read_goal_status(goal_path: Path) -> Optional[str]:
+    """
+    Прочитать статус цели, не разбирая файл целиком.
+
+    Файл читается построчно до первой строки "**Статус:** <значение>",
+    поэтому обычно затрагивается только его начало. Правило совпадает
+    с parse_goal_file: учитывается первое непустое значение.
+
+    Args:
+        goal_path: Путь к файлу цели
+
+    Returns:
+        Optional[str]: Статус (active, paused, ...) или None если его нет
+    """
+    with open(goal_path, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith(STATUS_MARKER):
+                value = line[len(STATUS_MARKER):].strip()
+                if value:
+                    return value.decode('utf-8', errors='replace')
+    return None
+
+
+def parse_goals_cached(goal_files: Iterable[Path],
+                       parse_func: Callable[[Path], Dict[str, Any]],
+                       prefilter: Optional[Callable[[Path], bool]] = None) -> List[Dict[str, Any]]:
+    """
+    Разобрать файлы целей, используя кэш для неизменённых файлов.
+
+    Args:
+        goal_files: Пути к файлам целей
+        parse_func: Функция разбора одного файла (parse_goal_file)
+        prefilter: Быстрая проверка перед разбором изменённых файлов. Файлы,
+            не прошедшие её, не разбираются, не попадают в результат и не
+            кэшируются: кэш зависит только от содержимого файлов, а не от
+            prefilter вызывающего. Уже закэшированные цели возвращаются без
+            проверки, поэтому фильтровать результат должен вызывающий
+
+    Returns:
+        List[Dict[str, Any]]: Разобранные цели в порядке goal_files
+    """
+    cache = load_json_cache(CACHE_FILE, CACHE_VERSION)
+    stats = {}
+    hits = {}
+    misses = []
+
+    for goal_path in goal_files:
+        key = str(goal_path)
+        stat = os.stat(goal_path)
+        stats[key] = stat
+        entry = cache.get(key)
+
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            hits[key] = entry['data']
+        else:
+            misses.append(goal_path)
+
+    def parse_one(goal_path):
+        if prefilter is None or prefilter(goal_path):
+            return parse_func(goal_path)
+        return None
+
+    parsed = [parse_one(goal_path) for goal_path in misses]
+
+    # None - файл отклонён prefilter: его не кэшируем
+    parsed_goals = {
+        str(goal_path): goal_data
+        for goal_path, goal_data in zip(misses, parsed)
+        if goal_data is not None
+    }
+
+    goals = []
+    entries = {}
+    for key, stat in stats.items():
+        goal_data = hits.get(key, parsed_goals.get(key))
+        if goal_data is None:
+            continue
+        goals.append(goal_data)
+        entries[key] = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'data': goal_data
+        }
+
+    # Сохраняем, если что-то разобрали заново или какие-то цели удалены
+    if parsed_goals or entries.keys() != cache.keys():
+        save_json_cache(CACHE_FILE, CACHE_VERSION, entries)
+
+    return goals
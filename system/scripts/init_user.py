@@ -25,19 +25,37 @@ import argparse
 import os
 import shutil
 from pathlib import Path
-import yaml
 import sys
 
 # Добавить system/scripts в sys.path для импорта config_loader
 SCRIPT_DIR = Path(__file__).parent
-sys.path.insert(0, str(SCRIPT_DIR))
+if str(SCRIPT_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_DIR))
 
-from config_loader import get_project_root, get_config_dir
+from config_loader import get_project_root, get_config_dir, get_yaml_dumper, get_yaml_loader, write_text_file
 
 PROJECT_ROOT = get_project_root()
 CONFIG_DIR = get_config_dir()
 USER_DATA_DIR = PROJECT_ROOT / "user_data"
 
+# Содержимое .env, создаваемого в интерактивном режиме
+_ENV_TEMPLATE = """\
+# plan_expo Environment Variables
+# Созд automatically by init_user.py
+
+# Telegram Bot Configuration
+TELEGRAM_BOT_TOKEN={telegram_token}
+TELEGRAM_CHAT_ID={telegram_chat_id}
+
+# Slack Configuration
+SLACK_WEBHOOK_URL={slack_webhook}
+
+# AI API Keys (optional)
+OPENAI_API_KEY=
+ANTHROPIC_API_KEY=
+GOOGLE_AI_API_KEY=
+"""
+
 
 def print_header(text: str):
     """Печать заголовка."""
@@ -96,9 +114,12 @@ def create_user_settings(timezone="UTC", interactive=True):
         }
     }
 
+    # PyYAML импортируется только когда нужно писать YAML
+    import yaml
+
     settings_file = CONFIG_DIR / "user_settings.yaml"
     with open(settings_file, 'w', encoding='utf-8') as f:
-        yaml.dump(settings, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
+        yaml.dump(settings, f, Dumper=get_yaml_dumper(), default_flow_style=False, allow_unicode=True, sort_keys=False)
 
     print(f"\n  ✅ Создан {settings_file.relative_to(PROJECT_ROOT)}")
 
@@ -145,13 +166,18 @@ def create_user_directories():
         USER_DATA_DIR / "logs/cron"
     ]
 
-    created = 0
-    for dir_path in dirs:
-        if not dir_path.exists():
-            dir_path.mkdir(parents=True, exist_ok=True)
-            created += 1
+    needed = [dir_path for dir_path in dirs if not dir_path.is_dir()]
 
-    print(f"  ✅ Создано директорий: {created}")
+    # Предков создаёт mkdir(parents=True) для вложенной директории,
+    # поэтому mkdir вызываем только для листьев
+    leaves = [
+        dir_path for dir_path in needed
+        if not any(dir_path in other.parents for other in needed)
+    ]
+    for dir_path in leaves:
+        dir_path.mkdir(parents=True, exist_ok=True)
+
+    print(f"  ✅ Создано директорий: {len(needed)}")
 
 
 def setup_env_file(interactive=True):
@@ -190,22 +216,12 @@ def setup_env_file(interactive=True):
 
     slack_webhook = input("  Slack Webhook URL (Enter для пропуска): ").strip()
 
-    # Создать .env файл
-    with open(env_file, 'w', encoding='utf-8') as f:
-        f.write("# plan_expo Environment Variables\n")
-        f.write("# Созд automatically by init_user.py\n\n")
-
-        f.write("# Telegram Bot Configuration\n")
-        f.write(f"TELEGRAM_BOT_TOKEN={telegram_token}\n")
-        f.write(f"TELEGRAM_CHAT_ID={telegram_chat_id}\n\n")
-
-        f.write("# Slack Configuration\n")
-        f.write(f"SLACK_WEBHOOK_URL={slack_webhook}\n\n")
-
-        f.write("# AI API Keys (optional)\n")
-        f.write("OPENAI_API_KEY=\n")
-        f.write("ANTHROPIC_API_KEY=\n")
-        f.write("GOOGLE_AI_API_KEY=\n")
+    # Создать .env файл одной записью
+    write_text_file(env_file, _ENV_TEMPLATE.format(
+        telegram_token=telegram_token,
+        telegram_chat_id=telegram_chat_id,
+        slack_webhook=slack_webhook
+    ))
 
     print(f"\n  ✅ Создан .env")
 
@@ -259,10 +275,12 @@ def select_ai_model(interactive=True):
 
     selected_model = models_map.get(choice, "claude")
 
+    import yaml
+
     # Загрузить текущую конфигурацию AI моделей
     if ai_config_file.exists():
         with open(ai_config_file, 'r', encoding='utf-8') as f:
-            ai_config = yaml.safe_load(f)
+            ai_config = yaml.load(f, Loader=get_yaml_loader())
     else:
         # Создать дефолтную конфигурацию
         ai_config = {
@@ -291,12 +309,17 @@ def select_ai_model(interactive=True):
             }
         }
 
+    # Файл уже содержит выбранную модель — переписывать его незачем
+    unchanged = ai_config_file.exists() and ai_config.get('current_model') == selected_model
+
     # Обновить выбранную модель
     ai_config['current_model'] = selected_model
 
-    # Сохранить конфигурацию
-    with open(ai_config_file, 'w', encoding='utf-8') as f:
-        yaml.dump(ai_config, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
+    # Сохранить конфигурацию (атомарно: читатели не увидят недописанный YAML)
+    if not unchanged:
+        write_text_file(ai_config_file, yaml.dump(
+            ai_config, Dumper=get_yaml_dumper(), default_flow_style=False, allow_unicode=True, sort_keys=False
+        ))
 
     model_name = ai_config['models'][selected_model]['name']
     print(f"\n  ✅ Выбрана AI модель: {model_name}")
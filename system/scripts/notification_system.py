@@ -18,52 +18,93 @@
   python scripts/notification_system.py check
 """
 
-import subprocess
 import sys
 import argparse
 import json
+import os
+import re
 from pathlib import Path
 import sys
 
 # Добавить system/scripts в sys.path для импорта config_loader
 SCRIPT_DIR = Path(__file__).parent
-sys.path.insert(0, str(SCRIPT_DIR))
+if str(SCRIPT_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_DIR))
 
-from config_loader import get_project_root, get_path
+from config_loader import get_project_root, get_path, load_config as load_config_file
 from datetime import datetime, timedelta
-import yaml
 
 # Пути
 PROJECT_ROOT = get_project_root()
-CONFIG_FILE = PROJECT_ROOT / "config"  # config всегда в корне / "notifications.yaml"
 REFLECTIONS_DIR = get_path("reflections") / "daily"
 DASHBOARDS_DIR = get_path("dashboards")
 STREAKS_FILE = DASHBOARDS_DIR / "streaks" / "streaks_data.json"
 
+# Метрики в markdown дашбордов (для дашбордов без .metrics.json)
+_OPERATIONS_RE = re.compile(r'Операции:\s*(\d+)%')
+_TACTICS_RE = re.compile(r'Тактика:\s*(\d+)%')
+_STREAK_RE = re.compile(r'Streak:\s*(\d+)')
+_AVG_OPERATIONS_RE = re.compile(r'Средний % операций:\s*(\d+\.?\d*)%')
+_AVG_TACTICS_RE = re.compile(r'Средний % тактики:\s*(\d+\.?\d*)%')
+
+# На сколько дней/недель назад искать дашборд по имени, прежде чем перебирать директорию
+DASHBOARD_LOOKBACK_DAYS = 7
+DASHBOARD_LOOKBACK_WEEKS = 4
+
+DAILY_METRIC_PATTERNS = {
+    'operations': _OPERATIONS_RE,
+    'tactics': _TACTICS_RE,
+    'streak': _STREAK_RE
+}
+WEEKLY_METRIC_PATTERNS = {
+    'avg_operations': _AVG_OPERATIONS_RE,
+    'avg_tactics': _AVG_TACTICS_RE
+}
+
+# AppleScript уведомления: заголовок, текст и звук передаются аргументами,
+# поэтому их не нужно экранировать внутри кода скрипта
+MACOS_NOTIFICATION_SCRIPT = """\
+on run argv
+    if (count of argv) > 2 then
+        display notification (item 2 of argv) with title (item 1 of argv) sound name (item 3 of argv)
+    else
+        display notification (item 2 of argv) with title (item 1 of argv)
+    end if
+end run
+"""
+
+# HTTP-сессия для Telegram/Slack: соединения переиспользуются между запросами
+_http_session = None
+
 
 def load_config():
     """Загрузить конфигурацию."""
-    if not CONFIG_FILE.exists():
-        print(f"⚠️ Конфигурация не найдена: {CONFIG_FILE}")
-        return None
-
-    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+    # config/notifications.yaml (или .yaml.example) разбирается общим загрузчиком:
+    # CSafeLoader при наличии libyaml
+    config = load_config_file('notifications')
+    if config is None:
+        print("⚠️ Конфигурация не найдена: config/notifications.yaml")
+    return config
 
 
 def send_macos_notification(title, message, sound=None):
     """Отправить уведомление через macOS Notification Center."""
+    # subprocess нужен только для macOS канала, импорт замедляет запуск
+    import subprocess
+
     try:
-        # Базовая команда
-        script = f'display notification "{message}" with title "{title}"'
+        # Скрипт читается из stdin, значения — аргументы run-обработчика
+        command = ['osascript', '-', title, message]
 
         # Добавить звук если указан
         if sound and sound != "null":
-            script += f' sound name "{sound}"'
+            command.append(sound)
 
         # Выполнить osascript
         subprocess.run(
-            ['osascript', '-e', script],
+            command,
+            input=MACOS_NOTIFICATION_SCRIPT,
+            text=True,
             check=True,
             capture_output=True
         )
@@ -73,10 +114,24 @@ def send_macos_notification(title, message, sound=None):
         return False
 
 
+def get_http_session():
+    """Получить общую HTTP-сессию (requests импортируется при первом вызове)."""
+    global _http_session
+
+    if _http_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
+        _http_session = session
+    return _http_session
+
+
 def send_telegram_notification(title, message, config):
     """Отправить уведомление через Telegram."""
     try:
-        import requests
+        session = get_http_session()
 
         bot_token = config.get('bot_token', '')
         chat_id = config.get('chat_id', '')
@@ -95,7 +150,7 @@ def send_telegram_notification(title, message, config):
             'parse_mode': 'Markdown'
         }
 
-        response = requests.post(url, json=payload, timeout=10)
+        response = session.post(url, json=payload, timeout=10)
         response.raise_for_status()
         return True
 
@@ -110,7 +165,7 @@ def send_telegram_notification(title, message, config):
 def send_slack_notification(title, message, config):
     """Отправить уведомление через Slack."""
     try:
-        import requests
+        session = get_http_session()
 
         webhook_url = config.get('webhook_url', '')
 
@@ -122,7 +177,7 @@ def send_slack_notification(title, message, config):
             'text': f"*{title}*\n{message}"
         }
 
-        response = requests.post(webhook_url, json=payload, timeout=10)
+        response = session.post(webhook_url, json=payload, timeout=10)
         response.raise_for_status()
         return True
 
@@ -164,71 +219,120 @@ def send_notification(title, message, channels, config, sound=None):
 
 def get_reflection_path(date):
     """Получить путь к рефлексии за дату."""
-    year = date.strftime("%Y")
-    month = date.strftime("%m")
-    filename = date.strftime("%Y-%m-%d")
-    return REFLECTIONS_DIR / year / month / f"{filename}.md"
+    # Форматирование чисел вместо strftime
+    year = f"{date.year:04d}"
+    month = f"{date.month:02d}"
+    return REFLECTIONS_DIR / year / month / f"{year}-{month}-{date.day:02d}.md"
 
 
 def is_reflection_filled(date):
     """Проверить заполнена ли рефлексия."""
-    reflection_path = get_reflection_path(date)
-
-    if not reflection_path.exists():
+    # Один stat вместо exists() + stat()
+    try:
+        size = get_reflection_path(date).stat().st_size
+    except (FileNotFoundError, NotADirectoryError):
         return False
 
     # Проверить размер файла (заполненная рефлексия > 1KB)
-    return reflection_path.stat().st_size > 1024
+    return size > 1024
+
+
+def load_dashboard_metrics(dashboard_path):
+    """Загрузить метрики из .metrics.json рядом с дашбордом (None если файла нет)."""
+    try:
+        with open(dashboard_path.with_suffix('.metrics.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
 
-def load_latest_dashboard_data():
+def scan_dashboard_metrics(dashboard_path, patterns):
+    """Найти первое значение каждой метрики, читая дашборд построчно до последней найденной."""
+    pending = dict(patterns)
+    values = {}
+
+    with open(dashboard_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            for key, pattern in list(pending.items()):
+                match = pattern.search(line)
+                if match:
+                    values[key] = match.group(1)
+                    del pending[key]
+            if not pending:
+                break
+
+    return values
+
+
+def find_latest_dashboard(dashboard_dir, candidate_names):
+    """Найти последний дашборд: сначала по ожидаемым именам (от новых к старым), затем перебором."""
+    for name in candidate_names:
+        dashboard_path = dashboard_dir / name
+        if dashboard_path.exists():
+            return dashboard_path
+
+    # Перебор директории: максимум по имени, без сортировки и Path на каждый файл
+    with os.scandir(dashboard_dir) as entries:
+        latest = max((entry.name for entry in entries if entry.name.endswith('.md')), default=None)
+    return dashboard_dir / latest if latest else None
+
+
+def load_latest_dashboard_data(today):
     """Загрузить данные последнего дашборда."""
-    today = datetime.now().strftime("%Y-%m-%d")
     daily_dashboard_dir = DASHBOARDS_DIR / "daily"
 
-    # Поиск последнего дашборда
+    # Поиск последнего дашборда: дневные дашборды называются YYYY-MM-DD.md
     if daily_dashboard_dir.exists():
-        dashboards = sorted(daily_dashboard_dir.glob("*.md"), reverse=True)
-        if dashboards:
-            # Парсить markdown для извлечения метрик
-            with open(dashboards[0], 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Извлечь метрики (упрощенный парсинг)
-            import re
-
-            operations_match = re.search(r'Операции:\s*(\d+)%', content)
-            tactics_match = re.search(r'Тактика:\s*(\d+)%', content)
-            streak_match = re.search(r'Streak:\s*(\d+)', content)
+        latest = find_latest_dashboard(daily_dashboard_dir, (
+            f"{day.year:04d}-{day.month:02d}-{day.day:02d}.md"
+            for day in (today - timedelta(days=i) for i in range(DASHBOARD_LOOKBACK_DAYS))
+        ))
+        if latest:
+            # Метрики, сохранённые генератором дашборда
+            metrics = load_dashboard_metrics(latest)
+            if metrics is not None:
+                return {
+                    'operations': metrics.get('operations') or 0,
+                    'tactics': metrics.get('tactics') or 0,
+                    'streak': metrics.get('streak') or 0
+                }
+
+            # Дашборд без файла метрик: извлечь метрики из markdown (упрощенный парсинг)
+            values = scan_dashboard_metrics(latest, DAILY_METRIC_PATTERNS)
 
             return {
-                'operations': int(operations_match.group(1)) if operations_match else 0,
-                'tactics': int(tactics_match.group(1)) if tactics_match else 0,
-                'streak': int(streak_match.group(1)) if streak_match else 0
+                key: int(values[key]) if key in values else 0
+                for key in DAILY_METRIC_PATTERNS
             }
 
     return {'operations': 0, 'tactics': 0, 'streak': 0}
 
 
-def load_weekly_dashboard_data():
+def load_weekly_dashboard_data(today):
     """Загрузить данные недельного дашборда."""
     weekly_dashboard_dir = DASHBOARDS_DIR / "weekly"
 
+    # Недельные дашборды называются week_NN_YYYY.md, как их по умолчанию
+    # называет generate_weekly_dashboard.py (номер ISO недели и год даты)
     if weekly_dashboard_dir.exists():
-        dashboards = sorted(weekly_dashboard_dir.glob("*.md"), reverse=True)
-        if dashboards:
-            with open(dashboards[0], 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            import re
+        latest = find_latest_dashboard(weekly_dashboard_dir, (
+            f"week_{day.isocalendar()[1]:02d}_{day.year}.md"
+            for day in (today - timedelta(weeks=i) for i in range(DASHBOARD_LOOKBACK_WEEKS))
+        ))
+        if latest:
+            metrics = load_dashboard_metrics(latest)
+            if metrics is not None:
+                return {
+                    'avg_operations': metrics.get('avg_operations') or 0,
+                    'avg_tactics': metrics.get('avg_tactics') or 0
+                }
 
             # Извлечь средние показатели
-            avg_ops_match = re.search(r'Средний % операций:\s*(\d+\.?\d*)%', content)
-            avg_tac_match = re.search(r'Средний % тактики:\s*(\d+\.?\d*)%', content)
+            values = scan_dashboard_metrics(latest, WEEKLY_METRIC_PATTERNS)
 
             return {
-                'avg_operations': float(avg_ops_match.group(1)) if avg_ops_match else 0,
-                'avg_tactics': float(avg_tac_match.group(1)) if avg_tac_match else 0
+                key: float(values[key]) if key in values else 0
+                for key in WEEKLY_METRIC_PATTERNS
             }
 
     return {'avg_operations': 0, 'avg_tactics': 0}
@@ -242,10 +346,9 @@ def load_streaks_data():
     return {'habits': []}
 
 
-def notify_daily(config):
+def notify_daily(config, today):
     """Отправить дневное уведомление."""
-    today = datetime.now()
-    today_str = today.strftime("%Y-%m-%d")
+    today_str = f"{today.year:04d}-{today.month:02d}-{today.day:02d}"
 
     channels = config['notifications'].get('default_channels', ['macos'])
     templates = config.get('templates', {})
@@ -268,7 +371,7 @@ def notify_daily(config):
     # Вечернее уведомление (дашборд создан)
     else:
         # Загрузить данные дашборда
-        dashboard_data = load_latest_dashboard_data()
+        dashboard_data = load_latest_dashboard_data(today)
 
         template = templates.get('evening', {})
         title = template.get('title', 'plan_expo: Дашборд готов')
@@ -285,13 +388,13 @@ def notify_daily(config):
             print(f"⚠️ Не удалось отправить вечернее уведомление")
 
 
-def notify_weekly(config):
+def notify_weekly(config, today):
     """Отправить недельное уведомление."""
     channels = config['notifications'].get('default_channels', ['macos'])
     templates = config.get('templates', {})
 
     # Загрузить данные недельного дашборда
-    weekly_data = load_weekly_dashboard_data()
+    weekly_data = load_weekly_dashboard_data(today)
 
     template = templates.get('weekly', {})
     title = template.get('title', 'plan_expo: Недельный отчет')
@@ -307,13 +410,12 @@ def notify_weekly(config):
         print(f"⚠️ Не удалось отправить недельное уведомление")
 
 
-def check_and_notify(config):
+def check_and_notify(config, today):
     """Проверить условия и отправить предупреждения."""
     channels = config['notifications'].get('default_channels', ['macos'])
     templates = config.get('templates', {})
     health_checks = config.get('health_checks', {})
 
-    today = datetime.now()
     warnings = []
 
     # 1. Проверить заполнена ли рефлексия
@@ -328,40 +430,39 @@ def check_and_notify(config):
     streaks_data = load_streaks_data()
     streak_threshold = health_checks.get('streak_warning_threshold', 3)
 
-    low_streaks = [
-        h for h in streaks_data.get('habits', [])
-        if h.get('current_streak', 0) < streak_threshold
-    ]
-
-    if low_streaks:
-        habit_names = ', '.join([h['name'][:30] + '...' for h in low_streaks[:3]])
-        warnings.append(f"Streak под угрозой для {len(low_streaks)} привычек: {habit_names}")
-
-    # 3. Проверить низкую производительность
-    low_perf_days = health_checks.get('low_performance_days', 3)
-    low_perf_threshold = health_checks.get('low_performance_threshold', 50)
-
-    # Проверить последние N дней
-    low_performance_count = 0
-    for i in range(low_perf_days):
-        date = today - timedelta(days=i)
-        if is_reflection_filled(date):
-            # Упрощенная проверка (нужно парсить рефлексию для точных данных)
-            # Пока пропускаем
-            pass
-
-    # Отправить предупреждения если есть
+    # Один проход: считаем привычки под угрозой и запоминаем названия первых трёх
+    low_streak_count = 0
+    low_streak_names = []
+    for h in streaks_data.get('habits', []):
+        if h.get('current_streak', 0) < streak_threshold:
+            low_streak_count += 1
+            if len(low_streak_names) < 3:
+                low_streak_names.append(h['name'][:30] + '...')
+
+    if low_streak_count:
+        habit_names = ', '.join(low_streak_names)
+        warnings.append(f"Streak под угрозой для {low_streak_count} привычек: {habit_names}")
+
+    # 3. Низкая производительность (low_performance_days/low_performance_threshold)
+    # пока не проверяется: для этого нужно парсить рефлексии за последние N дней
+
+    # Отправить предупреждения если есть: все одним уведомлением
     if warnings:
         template = templates.get('warning', {})
         title = template.get('title', 'plan_expo: Предупреждение')
         sound = template.get('sound', 'Basso')
 
-        for warning in warnings:
-            message = template.get('message', '{warning_text}').format(warning_text=warning)
+        if len(warnings) == 1:
+            warning_text = warnings[0]
+        else:
+            warning_text = '\n'.join(f"• {warning}" for warning in warnings)
+        message = template.get('message', '{warning_text}').format(warning_text=warning_text)
 
-            if send_notification(title, message, channels, config, sound):
+        if send_notification(title, message, channels, config, sound):
+            for warning in warnings:
                 print(f"✅ Предупреждение отправлено: {warning}")
-            else:
+        else:
+            for warning in warnings:
                 print(f"⚠️ Не удалось отправить предупреждение: {warning}")
     else:
         print("✅ Все проверки пройдены. Предупреждений нет.")
@@ -405,13 +506,16 @@ def main():
         print("⚠️ Уведомления отключены в конфигурации")
         sys.exit(0)
 
+    # Текущее время определяется один раз за запуск
+    today = datetime.now()
+
     # Отправить уведомление по типу
     if args.notification_type == 'daily':
-        notify_daily(config)
+        notify_daily(config, today)
     elif args.notification_type == 'weekly':
-        notify_weekly(config)
+        notify_weekly(config, today)
     elif args.notification_type == 'check':
-        check_and_notify(config)
+        check_and_notify(config, today)
 
 
 if __name__ == "__main__":
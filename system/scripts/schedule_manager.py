@@ -17,6 +17,7 @@
   python scripts/schedule_manager.py list
 """
 
+import re
 import subprocess
 import sys
 import argparse
@@ -27,30 +28,48 @@ import sys
 SCRIPT_DIR = Path(__file__).parent
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from config_loader import get_project_root, get_path
+from config_loader import get_project_root, get_path, get_config_dir, get_yaml_loader, read_text_file
 from datetime import datetime
-import yaml
-import tempfile
-import os
 
 # Пути
 PROJECT_ROOT = get_project_root()
-CONFIG_FILE = PROJECT_ROOT / "config"  # config всегда в корне / "schedule.yaml"
+CONFIG_FILE = get_config_dir() / "schedule.yaml"
 LOGS_DIR = get_path("logs") / "cron"
 
 # Маркеры для crontab
 CRON_MARKER_START = "# BEGIN plan_expo automation"
 CRON_MARKER_END = "# END plan_expo automation"
 
+# Блок plan_expo: от строки с начальным маркером до ближайшей следующей строки
+# с конечным маркером (без начального) или до конца crontab, а также отдельные
+# строки с конечным маркером - так же, как при построчном разборе
+_PLAN_EXPO_BLOCK_RE = re.compile(
+    r'^[^\n]*{start}.*?(?:^(?![^\n]*{start})[^\n]*{end}[^\n]*(?:\n|\Z)|\Z)'
+    r'|^[^\n]*{end}[^\n]*(?:\n|\Z)'.format(
+        start=re.escape(CRON_MARKER_START), end=re.escape(CRON_MARKER_END)
+    ),
+    re.MULTILINE | re.DOTALL
+)
+# Пустые (или из одних пробелов) строки в конце
+_TRAILING_BLANK_LINES_RE = re.compile(r'(?:\A|\n)\s*\Z')
+
 
 def load_config():
     """Загрузить конфигурацию."""
+    # Нужен именно config/schedule.yaml: по .yaml.example нельзя ставить cron-задачи
     if not CONFIG_FILE.exists():
         print(f"❌ Конфигурация не найдена: {CONFIG_FILE}")
+        print("   Создайте её из примера: cp config/schedule.yaml.example config/schedule.yaml")
         sys.exit(1)
 
-    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+    import yaml
+
+    # CSafeLoader при наличии libyaml
+    try:
+        return yaml.load(read_text_file(CONFIG_FILE), Loader=get_yaml_loader())
+    except yaml.YAMLError as e:
+        print(f"❌ Ошибка разбора {CONFIG_FILE}: {e}")
+        sys.exit(1)
 
 
 def get_current_crontab():
@@ -74,25 +93,10 @@ def get_current_crontab():
 
 def remove_plan_expo_entries(crontab_content):
     """Удалить существующие записи plan_expo из crontab."""
-    lines = crontab_content.split('\n')
-    new_lines = []
-    skip = False
-
-    for line in lines:
-        if CRON_MARKER_START in line:
-            skip = True
-            continue
-        if CRON_MARKER_END in line:
-            skip = False
-            continue
-        if not skip:
-            new_lines.append(line)
+    content = _PLAN_EXPO_BLOCK_RE.sub('', crontab_content)
 
     # Удалить пустые строки в конце
-    while new_lines and not new_lines[-1].strip():
-        new_lines.pop()
-
-    return '\n'.join(new_lines)
+    return _TRAILING_BLANK_LINES_RE.sub('', content)
 
 
 def time_to_cron(time_str):
@@ -106,6 +110,8 @@ def generate_cron_entries(config):
     entries = []
     python_path = config['schedule'].get('python_path', 'python3')
     project_root = config['schedule'].get('project_root', str(PROJECT_ROOT))
+    # Path от корня проекта строим один раз, а не для каждой задачи
+    root_path = Path(project_root)
     log_dir = LOGS_DIR
 
     # Создать директорию для логов
@@ -120,7 +126,7 @@ def generate_cron_entries(config):
     if config.get('daily', {}).get('morning_reflection', {}).get('enabled', False):
         task = config['daily']['morning_reflection']
         cron_time = time_to_cron(task['time'])
-        script_path = Path(project_root) / task['script']
+        script_path = root_path / task['script']
         log_file = log_dir / "morning_reflection.log"
 
         entries.append(f"# {task['description']}")
@@ -132,7 +138,7 @@ def generate_cron_entries(config):
         entries.append("# Evening pipeline")
         for task in config['daily']['evening_pipeline']['tasks']:
             cron_time = time_to_cron(task['time'])
-            script_path = Path(project_root) / task['script']
+            script_path = root_path / task['script']
             log_file = log_dir / f"{task['name']}.log"
 
             args = ' '.join(task.get('args', []))
@@ -150,7 +156,7 @@ def generate_cron_entries(config):
 
         for task in config['weekly']['tasks']:
             cron_time = time_to_cron(task['time'])
-            script_path = Path(project_root) / task['script']
+            script_path = root_path / task['script']
             log_file = log_dir / f"{task['name']}.log"
 
             args = ' '.join(task.get('args', []))
@@ -164,7 +170,7 @@ def generate_cron_entries(config):
     # Проверки здоровья
     if config.get('health_checks', {}).get('enabled', False):
         task = config['health_checks']
-        script_path = Path(project_root) / task['script']
+        script_path = root_path / task['script']
         log_file = log_dir / "health_check.log"
 
         args = ' '.join(task.get('args', []))
@@ -196,16 +202,11 @@ def install_crontab(config):
     else:
         new_crontab = new_entries
 
-    # Записать через временный файл
-    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.cron') as f:
-        f.write(new_crontab)
-        f.write('\n')
-        temp_file = f.name
-
     try:
-        # Установить crontab
+        # Установить crontab: содержимое передается через stdin, без временного файла
         result = subprocess.run(
-            ['crontab', temp_file],
+            ['crontab', '-'],
+            input=new_crontab + '\n',
             capture_output=True,
             text=True,
             check=True
@@ -215,9 +216,6 @@ def install_crontab(config):
     except subprocess.CalledProcessError as e:
         print(f"❌ Ошибка установки crontab: {e.stderr}")
         return False
-    finally:
-        # Удалить временный файл
-        Path(temp_file).unlink(missing_ok=True)
 
 
 def remove_crontab():
@@ -227,16 +225,8 @@ def remove_crontab():
 
     if cleaned_crontab.strip():
         # Есть другие записи, обновить crontab
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.cron') as f:
-            f.write(cleaned_crontab)
-            f.write('\n')
-            temp_file = f.name
-
-        try:
-            subprocess.run(['crontab', temp_file], check=True)
-            print("✅ Записи plan_expo удалены из crontab")
-        finally:
-            Path(temp_file).unlink(missing_ok=True)
+        subprocess.run(['crontab', '-'], input=cleaned_crontab + '\n', text=True, check=True)
+        print("✅ Записи plan_expo удалены из crontab")
     else:
         # Crontab будет пустой, удалить полностью
         try:
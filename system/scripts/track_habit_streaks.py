@@ -13,7 +13,9 @@
 - Markdown отчет
 """
 
+import heapq
 import json
+import os
 import re
 import sys
 from pathlib import Path
@@ -23,14 +25,15 @@ import sys
 SCRIPT_DIR = Path(__file__).parent
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from config_loader import get_project_root, get_path
+from config_loader import get_project_root, get_path, write_text_file
+from goal_cache import read_goal_status
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
 import statistics
 
 # Импорт функций из существующих скриптов
 sys.path.append(str(Path(__file__).parent))
-from analyze_reflection import parse_reflection_file
+from analyze_reflection import list_reflection_files, try_parse_reflection_file
 
 # Пути к директориям
 PROJECT_ROOT = get_project_root()
@@ -39,16 +42,29 @@ REFLECTIONS_DIR = get_path("reflections")
 DAILY_DIR = REFLECTIONS_DIR / "daily"
 DASHBOARDS_DIR = get_path("dashboards") / "streaks"
 
+# Шаблоны привычек в файлах целей
+_IF_THEN_RE = re.compile(r'- ЕСЛИ (.+?) → ТО (.+?)(?:\n|$)')
+_TINY_HABIT_RE = re.compile(r'- После (.+?) → (.+?)(?:\n|$)')
+_CELEBRATION_RE = re.compile(r' → праздную:.*$')
+_WORD_RE = re.compile(r'\w+')
+
+# Названия дней недели по date.weekday(), как strftime('%A') в локали C
+# (скрипты не меняют локаль)
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
 
 def get_active_goals():
     """Получить все активные цели."""
     active_goals = []
     if GOALS_DIR.exists():
-        for goal_file in GOALS_DIR.glob("*.md"):
-            with open(goal_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                if '**Статус:** active' in content:
-                    active_goals.append((goal_file.stem, content))
+        with os.scandir(GOALS_DIR) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.name.endswith('.md'):
+                    continue
+                # Статус читается из начала файла; целиком читаем только активные цели
+                if entry.is_file() and read_goal_status(entry.path) == 'active':
+                    with open(entry.path, 'r', encoding='utf-8') as f:
+                        active_goals.append((entry.name[:-3], f.read()))
     return active_goals
 
 
@@ -57,8 +73,7 @@ def extract_habits(goal_content):
     habits = []
 
     # Implementation Intentions
-    if_then_pattern = r'- ЕСЛИ (.+?) → ТО (.+?)(?:\n|$)'
-    for match in re.finditer(if_then_pattern, goal_content):
+    for match in _IF_THEN_RE.finditer(goal_content):
         trigger = match.group(1).strip()
         action = match.group(2).strip()
         habits.append({
@@ -69,13 +84,12 @@ def extract_habits(goal_content):
         })
 
     # Tiny Habits
-    tiny_pattern = r'- После (.+?) → (.+?)(?:\n|$)'
-    for match in re.finditer(tiny_pattern, goal_content):
+    for match in _TINY_HABIT_RE.finditer(goal_content):
         anchor = match.group(1).strip()
         action = match.group(2).strip()
 
         # Удалить празднование если есть
-        action = re.sub(r' → праздную:.*$', '', action)
+        action = _CELEBRATION_RE.sub('', action)
 
         habits.append({
             'name': f"После {anchor} → {action}",
@@ -84,114 +98,123 @@ def extract_habits(goal_content):
             'action': action
         })
 
+    # Ключевые слова привычки не меняются: считаем их один раз, а не для каждой операции
+    for habit in habits:
+        habit['keywords'] = set(_WORD_RE.findall(habit['name'].lower()))
+        # Нужно пересечение хотя бы в 50% ключевых слов привычки
+        habit['min_matches'] = len(habit['keywords']) * 0.5
+
     return habits
 
 
 def check_habit_completion(habit, reflection_data):
     """Проверить выполнение привычки в рефлексии."""
-    # Проверить в выполненных операциях
-    operations_done = reflection_data.get('operations_done', [])
+    # Сначала дешевая проверка процента выполнения операций
+    # (None - процент не указан в рефлексии)
+    operations_percent = reflection_data.get('operations_percent', 0)
+    if operations_percent is not None and operations_percent >= 80:
+        # Если общий процент высокий, считаем что привычка выполнена
+        return True
 
-    for operation in operations_done:
-        operation_lower = operation.lower()
-        habit_lower = habit['name'].lower()
+    # Проверить в выполненных операциях (ключевые слова выделены при разборе рефлексии)
+    habit_keywords = habit['keywords']
+    min_matches = habit['min_matches']
 
-        # Простое совпадение по ключевым словам
-        habit_keywords = set(re.findall(r'\w+', habit_lower))
-        operation_keywords = set(re.findall(r'\w+', operation_lower))
+    operations_keywords = reflection_data.get('operation_keywords')
+    if operations_keywords is None:
+        # Рефлексия разобрана не через parse_streak_reflection
+        operations_keywords = [
+            set(_WORD_RE.findall(operation.lower()))
+            for operation in reflection_data.get('operations_done', [])
+        ]
 
+    for operation_keywords in operations_keywords:
         # Если есть пересечение ключевых слов (хотя бы 50% от привычки)
-        if len(habit_keywords & operation_keywords) >= len(habit_keywords) * 0.5:
+        if len(habit_keywords & operation_keywords) >= min_matches:
             return True
 
-    # Также проверить процент выполнения операций
-    if reflection_data.get('operations_percent', 0) >= 80:
-        # Если общий процент высокий, считаем что привычка выполнена
-        return True
-
     return False
 
 
 def get_reflection_path(date):
     """Получить путь к рефлексии за дату."""
-    year = date.strftime("%Y")
-    month = date.strftime("%m")
-    filename = date.strftime("%Y-%m-%d")
-    return DAILY_DIR / year / month / f"{filename}.md"
+    return DAILY_DIR / f"{date.year:04d}" / f"{date.month:02d}" / f"{date.year:04d}-{date.month:02d}-{date.day:02d}.md"
+
+
+def parse_streak_reflection(reflection_path):
+    """Разобрать рефлексию дня; None, если файл не читается или поврежден."""
+    reflection_data = try_parse_reflection_file(reflection_path)
+    if reflection_data is None:
+        return None
 
+    # Ключевые слова операций выделяем один раз, а не для каждой привычки
+    reflection_data['operation_keywords'] = [
+        set(_WORD_RE.findall(operation.lower()))
+        for operation in reflection_data.get('operations_done', [])
+    ]
+    return reflection_data
 
-def calculate_streaks(habit, days_back=90):
-    """Вычислить streaks для привычки."""
+
+def load_reflection_history(days_back=90):
+    """Разобрать рефлексии за последние days_back дней один раз для всех привычек."""
     today = datetime.now()
-    completion_history = []
+    dates = [today - timedelta(days=i) for i in range(days_back)]
 
-    # Собрать историю выполнения
-    for i in range(days_back):
-        date = today - timedelta(days=i)
+    # Несколько scandir по месяцам вместо stat для каждого дня
+    existing = list_reflection_files(dates)
+    history = []
+
+    # От новых к старым; None - рефлексии нет или она не разбирается
+    for date in dates:
         reflection_path = get_reflection_path(date)
+        reflection_data = parse_streak_reflection(reflection_path) if reflection_path.name in existing else None
+        history.append((date, reflection_data))
 
-        if reflection_path.exists():
-            try:
-                reflection_data = parse_reflection_file(reflection_path)
-                completed = check_habit_completion(habit, reflection_data)
-                completion_history.append({
-                    'date': date,
-                    'completed': completed,
-                    'day_of_week': date.strftime('%A')
-                })
-            except:
-                # Если ошибка парсинга, считаем не выполненным
-                completion_history.append({
-                    'date': date,
-                    'completed': False,
-                    'day_of_week': date.strftime('%A')
-                })
-        else:
-            # Рефлексия не существует
-            completion_history.append({
-                'date': date,
-                'completed': False,
-                'day_of_week': date.strftime('%A')
-            })
+    return history
+
+
+def calculate_streaks(habit, reflection_history):
+    """Вычислить streaks для привычки по подряд идущим дням от load_reflection_history."""
+    dates = []
+    completed_flags = []
+
+    # Собрать историю выполнения
+    for date, reflection_data in reflection_history:
+        # Нет рефлексии или она не разбирается - считаем не выполненным
+        completed = reflection_data is not None and check_habit_completion(habit, reflection_data)
+
+        dates.append(date)
+        completed_flags.append(completed)
 
     # Обратить порядок (от старых к новым)
-    completion_history.reverse()
-
-    # 1. Текущий streak
-    current_streak = 0
-    for entry in reversed(completion_history):
-        if entry['completed']:
-            current_streak += 1
-        else:
-            break
-
-    # 2. Максимальный streak
-    max_streak = 0
-    temp_streak = 0
-    for entry in completion_history:
-        if entry['completed']:
-            temp_streak += 1
-            max_streak = max(max_streak, temp_streak)
-        else:
-            temp_streak = 0
+    dates.reverse()
+    completed_flags.reverse()
 
-    # 3. Процент выполнения за периоды
-    last_7_days = completion_history[-7:] if len(completion_history) >= 7 else completion_history
-    last_30_days = completion_history[-30:] if len(completion_history) >= 30 else completion_history
+    # История как байты 0/1: подсчеты ниже выполняются методами bytes, без цикла на Python
+    completed_bits = bytes(completed_flags)
+    total_days = len(completed_bits)
+    total_completions = completed_bits.count(1)
 
-    completion_rate_7d = sum(1 for e in last_7_days if e['completed']) / len(last_7_days) * 100 if last_7_days else 0
-    completion_rate_30d = sum(1 for e in last_30_days if e['completed']) / len(last_30_days) * 100 if last_30_days else 0
-    completion_rate_all = sum(1 for e in completion_history if e['completed']) / len(completion_history) * 100 if completion_history else 0
+    # 1. Текущий streak: дни после последнего пропуска
+    current_streak = total_days - (completed_bits.rfind(0) + 1)
 
-    # 4. Паттерны по дням недели
-    day_completion = defaultdict(list)
-    for entry in completion_history:
-        day_completion[entry['day_of_week']].append(entry['completed'])
+    # 2. Максимальный streak: самая длинная серия между пропусками
+    max_streak = max(map(len, completed_bits.split(b'\x00')))
 
+    # 3. Процент выполнения за периоды
+    last_7_days = completed_bits[-7:]
+    last_30_days = completed_bits[-30:]
+
+    completion_rate_7d = last_7_days.count(1) / len(last_7_days) * 100 if last_7_days else 0
+    completion_rate_30d = last_30_days.count(1) / len(last_30_days) * 100 if last_30_days else 0
+    completion_rate_all = total_completions / total_days * 100 if total_days else 0
+
+    # 4. Паттерны по дням недели: дни идут подряд, поэтому каждый 7-й день,
+    # начиная с i-го, приходится на тот же день недели, что и dates[i]
     day_stats = {}
-    for day, completions in day_completion.items():
-        if completions:
-            day_stats[day] = sum(completions) / len(completions) * 100
+    for i, date in enumerate(dates[:7]):
+        same_weekday = completed_bits[i::7]
+        day_stats[DAY_NAMES[date.weekday()]] = same_weekday.count(1) / len(same_weekday) * 100
 
     # Лучшие и худшие дни
     if day_stats:
@@ -203,9 +226,8 @@ def calculate_streaks(habit, days_back=90):
         worst_days = []
 
     # 5. Средняя частота в неделю
-    weeks = len(completion_history) // 7
+    weeks = total_days // 7
     if weeks > 0:
-        total_completions = sum(1 for e in completion_history if e['completed'])
         avg_per_week = total_completions / weeks
     else:
         avg_per_week = 0
@@ -228,15 +250,17 @@ def generate_streaks_data():
     # Получить активные цели
     active_goals = get_active_goals()
 
-    all_habits = []
+    goal_habits = [(goal_name, extract_habits(goal_content)) for goal_name, goal_content in active_goals]
 
-    for goal_name, goal_content in active_goals:
-        # Извлечь привычки
-        habits = extract_habits(goal_content)
+    # Рефлексии читаем один раз, а не заново для каждой привычки
+    reflection_history = load_reflection_history() if any(habits for _, habits in goal_habits) else []
 
+    all_habits = []
+
+    for goal_name, habits in goal_habits:
         for habit in habits:
             # Вычислить streaks
-            streaks = calculate_streaks(habit)
+            streaks = calculate_streaks(habit, reflection_history)
 
             habit_data = {
                 'name': habit['name'],
@@ -256,8 +280,7 @@ def generate_streaks_data():
 def save_json_report(data, output_path):
     """Сохранить JSON отчет."""
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_text_file(output_path, json.dumps(data, ensure_ascii=False, indent=2))
     print(f"✅ JSON сохранен: {output_path}")
 
 
@@ -271,7 +294,8 @@ def generate_markdown_report(data, output_path):
 
     # Топ-5 стабильных привычек
     content += "## Топ-5 стабильных привычек\n\n"
-    top_habits = sorted(habits, key=lambda h: h['current_streak'], reverse=True)[:5]
+    # Тот же результат, что sorted(..., reverse=True)[:5], но без сортировки всего списка
+    top_habits = heapq.nlargest(5, habits, key=lambda h: h['current_streak'])
 
     for i, habit in enumerate(top_habits, 1):
         emoji = "🔥" if habit['current_streak'] >= 7 else "⚡"
@@ -11,8 +11,10 @@
 - --fix: Автоматически исправлять проблемы (миграция файлов)
 """
 
+import os
 import re
 import sys
+from collections import namedtuple
 from pathlib import Path
 import sys
 
@@ -20,9 +22,7 @@ import sys
 SCRIPT_DIR = Path(__file__).parent
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from config_loader import get_project_root, get_path
-from datetime import datetime
-import argparse
+from config_loader import get_project_root, get_path, load_json_cache, save_json_cache, write_text_file
 
 # Пути к директориям
 PROJECT_ROOT = get_project_root()
@@ -31,12 +31,49 @@ REFLECTIONS_DIR = get_path("reflections")
 DAILY_DIR = REFLECTIONS_DIR / "daily"
 DASHBOARDS_DIR = get_path("dashboards") / "validation"
 
+# Кэш результатов проверки файлов: проблемы файла берутся из кэша,
+# пока у него не изменились mtime и размер
+VALIDATION_CACHE_FILE = PROJECT_ROOT / ".cache" / "validation.json"
+# Увеличивать при изменении правил проверки, чтобы сбросить старый кэш
+VALIDATION_CACHE_VERSION = 1
+
+# Метаданные и проценты в файлах целей
+_STATUS_RE = re.compile(r'\*\*Статус:\*\*\s+(active|completed|paused|cancelled)')
+_CREATED_RE = re.compile(r'\*\*Дата создания:\*\*\s+(\d{4}-\d{2}-\d{2})')
+_UPDATED_RE = re.compile(r'\*\*Последнее обновление:\*\*\s+(\d{4}-\d{2}-\d{2})')
+# Проценты из 1-2 цифр не бывают больше 100, поэтому ищем только числа от трех цифр
+# (целиком: перед числом не должно быть цифры)
+_PERCENT_RE = re.compile(r'(?<!\d)(\d{3,})%')
+
+# Секции проверяются отдельными `in`: поиск подстроки останавливается на первом
+# вхождении и на файлах обычного размера быстрее общего regex по всему файлу
+
+# Обязательные секции цели: (заголовок, название для отчета)
+GOAL_REQUIRED_SECTIONS = (
+    ("## СТРАТЕГИЧЕСКИЙ УРОВЕНЬ", "Стратегический уровень"),
+    ("## ТАКТИЧЕСКИЙ УРОВЕНЬ", "Тактический уровень"),
+    ("## ОПЕРАЦИОННЫЙ УРОВЕНЬ", "Операционный уровень"),
+    ("## ИСТОРИЯ ИЗМЕНЕНИЙ", "История изменений")
+)
+
+# Рекомендуемые секции рефлексии
+REFLECTION_RECOMMENDED_SECTIONS = (
+    "## УТРО",
+    "## ДЕНЬ",
+    "## ВЕЧЕР",
+    "## ПРОГРЕСС ЗА ДЕНЬ",
+    "## РЕФЛЕКСИЯ"
+)
+
 # Типы проблем
 class ValidationIssue:
     CRITICAL = "critical"
     WARNING = "warning"
     RECOMMENDATION = "recommendation"
 
+# Проблема в отчете: кортеж легче словаря, поля читаются как атрибуты
+Issue = namedtuple('Issue', ['message', 'file', 'fix'])
+
 class ValidationReport:
     """Отчет валидации."""
     def __init__(self):
@@ -48,12 +85,7 @@ class ValidationReport:
 
     def add_issue(self, level, message, file_path=None, fix_command=None):
         """Добавить проблему в отчет."""
-        issue = {
-            "message": message,
-            "file": file_path,
-            "fix": fix_command
-        }
-        self.issues[level].append(issue)
+        self.issues[level].append(Issue(message, file_path, fix_command))
 
     def has_critical(self):
         """Есть ли критические ошибки."""
@@ -69,70 +101,86 @@ class ValidationReport:
         print(f"💡 Рекомендаций: {len(self.issues[ValidationIssue.RECOMMENDATION])}")
         print("="*60 + "\n")
 
-    def generate_markdown_report(self, output_path):
-        """Генерировать markdown отчет."""
-        today = datetime.now().strftime("%Y-%m-%d")
-
-        content = f"# Отчет валидации: {today}\n\n"
+    def generate_markdown_report(self, output_path, today):
+        """Генерировать markdown отчет за дату today (YYYY-MM-DD)."""
+        # Отчет собирается из частей и склеивается один раз
+        parts = [f"# Отчет валидации: {today}\n\n"]
 
         # Критические ошибки
-        content += f"## Критические ошибки ({len(self.issues[ValidationIssue.CRITICAL])})\n\n"
+        parts.append(f"## Критические ошибки ({len(self.issues[ValidationIssue.CRITICAL])})\n\n")
         if self.issues[ValidationIssue.CRITICAL]:
             for issue in self.issues[ValidationIssue.CRITICAL]:
-                content += f"- ❌ {issue['message']}\n"
-                if issue['file']:
-                    content += f"  - Файл: `{issue['file']}`\n"
-                if issue['fix']:
-                    content += f"  - Исправление: `{issue['fix']}`\n"
-                content += "\n"
+                parts.append(f"- ❌ {issue.message}\n")
+                if issue.file:
+                    parts.append(f"  - Файл: `{issue.file}`\n")
+                if issue.fix:
+                    parts.append(f"  - Исправление: `{issue.fix}`\n")
+                parts.append("\n")
         else:
-            content += "Не найдено\n\n"
+            parts.append("Не найдено\n\n")
 
         # Предупреждения
-        content += f"## Предупреждения ({len(self.issues[ValidationIssue.WARNING])})\n\n"
+        parts.append(f"## Предупреждения ({len(self.issues[ValidationIssue.WARNING])})\n\n")
         if self.issues[ValidationIssue.WARNING]:
             for issue in self.issues[ValidationIssue.WARNING]:
-                content += f"- ⚠️  {issue['message']}\n"
-                if issue['file']:
-                    content += f"  - Файл: `{issue['file']}`\n"
-                content += "\n"
+                parts.append(f"- ⚠️  {issue.message}\n")
+                if issue.file:
+                    parts.append(f"  - Файл: `{issue.file}`\n")
+                parts.append("\n")
         else:
-            content += "Не найдено\n\n"
+            parts.append("Не найдено\n\n")
 
         # Рекомендации
-        content += f"## Рекомендации ({len(self.issues[ValidationIssue.RECOMMENDATION])})\n\n"
+        parts.append(f"## Рекомендации ({len(self.issues[ValidationIssue.RECOMMENDATION])})\n\n")
         if self.issues[ValidationIssue.RECOMMENDATION]:
             for issue in self.issues[ValidationIssue.RECOMMENDATION]:
-                content += f"- 💡 {issue['message']}\n"
-                if issue['file']:
-                    content += f"  - Файл: `{issue['file']}`\n"
-                content += "\n"
+                parts.append(f"- 💡 {issue.message}\n")
+                if issue.file:
+                    parts.append(f"  - Файл: `{issue.file}`\n")
+                parts.append("\n")
         else:
-            content += "Не найдено\n\n"
+            parts.append("Не найдено\n\n")
 
         # Сохранить
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        write_text_file(output_path, ''.join(parts))
 
         print(f"✅ Отчет сохранен: {output_path}")
 
 
+def iter_markdown_files(directory, recursive=False):
+    """
+    Найти .md файлы в directory через os.scandir, без Path на каждый файл.
+
+    Порядок и состав те же, что у Path.glob("*.md") / Path.rglob("*.md"):
+    сначала файлы директории, затем поддиректории по очереди (без перехода
+    по символическим ссылкам). Возвращаются строковые пути.
+    """
+    try:
+        with os.scandir(directory) as entries:
+            entries = list(entries)
+    except OSError:
+        # Как и glob: отсутствующая или недоступная директория пропускается
+        return
+
+    for entry in entries:
+        if entry.name.endswith('.md'):
+            yield entry.path
+
+    if recursive:
+        for entry in entries:
+            if entry.is_dir() and not entry.is_symlink():
+                yield from iter_markdown_files(entry.path, recursive=True)
+
+
 def validate_goal_file(goal_path, report):
-    """Валидация файла цели."""
+    """Валидация файла цели. Возвращает False, если файл не удалось прочитать."""
     try:
         with open(goal_path, 'r', encoding='utf-8') as f:
             content = f.read()
 
         # Проверка обязательных секций
-        required_sections = [
-            ("## СТРАТЕГИЧЕСКИЙ УРОВЕНЬ", "Стратегический уровень"),
-            ("## ТАКТИЧЕСКИЙ УРОВЕНЬ", "Тактический уровень"),
-            ("## ОПЕРАЦИОННЫЙ УРОВЕНЬ", "Операционный уровень"),
-            ("## ИСТОРИЯ ИЗМЕНЕНИЙ", "История изменений")
-        ]
-
-        for pattern, name in required_sections:
+        for pattern, name in GOAL_REQUIRED_SECTIONS:
             if pattern not in content:
                 report.add_issue(
                     ValidationIssue.CRITICAL,
@@ -142,7 +190,7 @@ def validate_goal_file(goal_path, report):
 
         # Проверка метаданных
         # Статус
-        status_match = re.search(r'\*\*Статус:\*\*\s+(active|completed|paused|cancelled)', content)
+        status_match = _STATUS_RE.search(content)
         if not status_match:
             report.add_issue(
                 ValidationIssue.CRITICAL,
@@ -151,7 +199,7 @@ def validate_goal_file(goal_path, report):
             )
 
         # Дата создания
-        created_match = re.search(r'\*\*Дата создания:\*\*\s+(\d{4}-\d{2}-\d{2})', content)
+        created_match = _CREATED_RE.search(content)
         if not created_match:
             report.add_issue(
                 ValidationIssue.WARNING,
@@ -160,7 +208,7 @@ def validate_goal_file(goal_path, report):
             )
 
         # Последнее обновление
-        updated_match = re.search(r'\*\*Последнее обновление:\*\*\s+(\d{4}-\d{2}-\d{2})', content)
+        updated_match = _UPDATED_RE.search(content)
         if not updated_match:
             report.add_issue(
                 ValidationIssue.WARNING,
@@ -169,7 +217,7 @@ def validate_goal_file(goal_path, report):
             )
 
         # Проверка процентов (должны быть 0-100)
-        percent_matches = re.findall(r'(\d+)%', content)
+        percent_matches = _PERCENT_RE.findall(content)
         for percent in percent_matches:
             if int(percent) > 100:
                 report.add_issue(
@@ -184,30 +232,44 @@ def validate_goal_file(goal_path, report):
             f"Ошибка чтения файла: {str(e)}",
             file_path=goal_path
         )
+        return False
+
+    return True
+
 
+def validate_reflections_structure(report, reflection_files, fix=False):
+    """
+    Валидация структуры директорий рефлексий.
 
-def validate_reflections_structure(report, fix=False):
-    """Валидация структуры директорий рефлексий."""
+    reflection_files - все .md файлы daily/ (iter_markdown_files). Возвращает
+    True, если с --fix файлы были перемещены и список нужно построить заново.
+    """
     if not DAILY_DIR.exists():
         report.add_issue(
             ValidationIssue.CRITICAL,
             f"Директория рефлексий не существует: {DAILY_DIR}"
         )
-        return
+        return False
 
-    # Найти файлы в неправильной структуре
-    misplaced_files = []
-    for file_path in DAILY_DIR.glob("*.md"):
-        # Файлы не должны быть напрямую в daily/
-        misplaced_files.append(file_path)
+    # Найти файлы в неправильной структуре: файлы не должны быть напрямую в daily/
+    daily_dir = str(DAILY_DIR)
+    misplaced_files = [
+        Path(file_path) for file_path in reflection_files
+        if os.path.dirname(file_path) == daily_dir
+    ]
+    moved = False
 
     for file_path in misplaced_files:
         # Извлечь дату из имени файла
         filename = file_path.stem
-        date_match = re.match(r'(\d{4})-(\d{2})-(\d{2})', filename)
+        # Имя начинается с YYYY-MM-DD: проверка срезами, isdecimal() - те же цифры, что \d
+        has_date = (
+            len(filename) >= 10 and filename[4] == '-' and filename[7] == '-'
+            and filename[:4].isdecimal() and filename[5:7].isdecimal() and filename[8:10].isdecimal()
+        )
 
-        if date_match:
-            year, month, day = date_match.groups()
+        if has_date:
+            year, month = filename[:4], filename[5:7]
             correct_path = DAILY_DIR / year / month / f"{filename}.md"
 
             report.add_issue(
@@ -221,6 +283,7 @@ def validate_reflections_structure(report, fix=False):
             if fix:
                 correct_path.parent.mkdir(parents=True, exist_ok=True)
                 file_path.rename(correct_path)
+                moved = True
                 print(f"✅ Перемещено: {file_path} → {correct_path}")
         else:
             report.add_issue(
@@ -229,24 +292,18 @@ def validate_reflections_structure(report, fix=False):
                 file_path=file_path
             )
 
+    return moved
+
 
 def validate_reflection_file(reflection_path, report):
-    """Валидация файла рефлексии."""
+    """Валидация файла рефлексии. Возвращает False, если файл не удалось прочитать."""
     try:
         with open(reflection_path, 'r', encoding='utf-8') as f:
             content = f.read()
 
         # Проверка основных секций (не все обязательны, но полезно знать)
-        recommended_sections = [
-            "## УТРО",
-            "## ДЕНЬ",
-            "## ВЕЧЕР",
-            "## ПРОГРЕСС ЗА ДЕНЬ",
-            "## РЕФЛЕКСИЯ"
-        ]
-
         missing_sections = []
-        for section in recommended_sections:
+        for section in REFLECTION_RECOMMENDED_SECTIONS:
             if section not in content:
                 missing_sections.append(section)
 
@@ -263,22 +320,76 @@ def validate_reflection_file(reflection_path, report):
             f"Ошибка чтения файла рефлексии: {str(e)}",
             file_path=reflection_path
         )
+        return False
+
+    return True
+
+
+def validate_file_cached(file_path, validate_func, report, cache, entries):
+    """Проверить файл функцией validate_func или взять его проблемы из кэша."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        # Файл недоступен: ошибку чтения сообщит сама проверка
+        validate_func(file_path, report)
+        return
+
+    entry = cache.get(file_path)
+    if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+        issues = entry['issues']
+        readable = True
+    else:
+        file_report = ValidationReport()
+        readable = validate_func(file_path, file_report)
+        issues = [
+            [level, issue.message, issue.fix]
+            for level, level_issues in file_report.issues.items()
+            for issue in level_issues
+        ]
+
+    # Ошибку чтения не кэшируем: она может быть временной, а mtime и размер не изменятся
+    if readable:
+        entries[file_path] = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'issues': issues
+        }
+
+    for level, message, fix_command in issues:
+        report.add_issue(level, message, file_path=file_path, fix_command=fix_command)
+
+
+def format_issues(issues, icon, show_fix=False):
+    """Текст списка проблем для вывода в консоль."""
+    parts = []
+    for issue in issues:
+        parts.append(f"  {icon} {issue.message}\n")
+        if issue.file:
+            parts.append(f"     Файл: {issue.file}\n")
+        if show_fix and issue.fix:
+            parts.append(f"     Исправление: {issue.fix}\n")
+        parts.append("\n")
+    return ''.join(parts)
 
 
 def validate_all(fix=False):
     """Основная функция валидации."""
     report = ValidationReport()
 
+    # Неизмененные с прошлого запуска файлы не перечитываются
+    cache = load_json_cache(VALIDATION_CACHE_FILE, VALIDATION_CACHE_VERSION)
+    cache_entries = {}
+
     print("Начинаю валидацию проекта plan_expo...\n")
 
     # Валидация целей
     print("📋 Проверка файлов целей...")
     if GOALS_DIR.exists():
-        goal_files = list(GOALS_DIR.glob("*.md"))
+        goal_files = list(iter_markdown_files(GOALS_DIR))
         print(f"   Найдено целей: {len(goal_files)}")
 
         for goal_file in goal_files:
-            validate_goal_file(goal_file, report)
+            validate_file_cached(goal_file, validate_goal_file, report, cache, cache_entries)
     else:
         report.add_issue(
             ValidationIssue.CRITICAL,
@@ -287,50 +398,44 @@ def validate_all(fix=False):
 
     # Валидация структуры рефлексий
     print("\n📝 Проверка структуры рефлексий...")
-    validate_reflections_structure(report, fix=fix)
+    # Один обход daily/ и для проверки структуры, и для проверки файлов;
+    # повторный - только если --fix переместил файлы
+    reflection_files = list(iter_markdown_files(DAILY_DIR, recursive=True))
+    if validate_reflections_structure(report, reflection_files, fix=fix):
+        reflection_files = list(iter_markdown_files(DAILY_DIR, recursive=True))
 
     # Валидация файлов рефлексий
     print("\n📅 Проверка файлов рефлексий...")
-    reflection_files = list(DAILY_DIR.rglob("*.md"))
     print(f"   Найдено рефлексий: {len(reflection_files)}")
 
     for reflection_file in reflection_files:
-        validate_reflection_file(reflection_file, report)
+        validate_file_cached(reflection_file, validate_reflection_file, report, cache, cache_entries)
+
+    # Сохраняем, если что-то перепроверили или какие-то файлы удалены
+    if cache_entries != cache:
+        save_json_cache(VALIDATION_CACHE_FILE, VALIDATION_CACHE_VERSION, cache_entries)
 
     # Вывод результатов
     report.print_summary()
 
-    # Детали
+    # Детали: один print на уровень вместо нескольких на каждую проблему
     if report.issues[ValidationIssue.CRITICAL]:
-        print("КРИТИЧЕСКИЕ ОШИБКИ:\n")
-        for issue in report.issues[ValidationIssue.CRITICAL]:
-            print(f"  ❌ {issue['message']}")
-            if issue['file']:
-                print(f"     Файл: {issue['file']}")
-            if issue['fix']:
-                print(f"     Исправление: {issue['fix']}")
-            print()
+        print("КРИТИЧЕСКИЕ ОШИБКИ:\n\n" + format_issues(report.issues[ValidationIssue.CRITICAL], "❌", show_fix=True), end='')
 
     if report.issues[ValidationIssue.WARNING]:
-        print("\nПРЕДУПРЕЖДЕНИЯ:\n")
-        for issue in report.issues[ValidationIssue.WARNING]:
-            print(f"  ⚠️  {issue['message']}")
-            if issue['file']:
-                print(f"     Файл: {issue['file']}")
-            print()
+        print("\nПРЕДУПРЕЖДЕНИЯ:\n\n" + format_issues(report.issues[ValidationIssue.WARNING], "⚠️ "), end='')
 
     if report.issues[ValidationIssue.RECOMMENDATION]:
-        print("\nРЕКОМЕНДАЦИИ:\n")
-        for issue in report.issues[ValidationIssue.RECOMMENDATION]:
-            print(f"  💡 {issue['message']}")
-            if issue['file']:
-                print(f"     Файл: {issue['file']}")
-            print()
+        print("\nРЕКОМЕНДАЦИИ:\n\n" + format_issues(report.issues[ValidationIssue.RECOMMENDATION], "💡"), end='')
 
     # Сохранить отчет
-    today = datetime.now().strftime("%Y-%m-%d")
+    # Дата берется один раз: заголовок отчета и имя файла совпадают и около полуночи
+    from datetime import datetime
+
+    now = datetime.now()
+    today = f"{now.year:04d}-{now.month:02d}-{now.day:02d}"
     report_path = DASHBOARDS_DIR / f"{today}_validation_report.md"
-    report.generate_markdown_report(report_path)
+    report.generate_markdown_report(report_path, today)
 
     # Exit code
     if report.has_critical():
@@ -340,6 +445,8 @@ def validate_all(fix=False):
 
 def main():
     """Главная функция."""
+    import argparse
+
     parser = argparse.ArgumentParser(description='Валидация структуры целей и рефлексий')
     parser.add_argument('--fix', action='store_true', help='Автоматически исправить проблемы')
 